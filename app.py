@@ -1,15 +1,35 @@
 # app.py — Goalytics Dashboard (dark theme + real data)
 import os
-import re
+import time
+from functools import wraps
 import pandas as pd
 import streamlit as st
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
+
+from cards import card, grid, side_grid
+from cube import RollupCube
+from downsample import downsample
+from dtypes import compact, compact_match, footprint, to_num
+from facets import FacetIndex
+from figures import (HOME_AWAY_FIELDS, MANIFEST, Artifacts, match_predicates as resolve_match_predicates,
+                     nz, season_frame, side_totals, totals)
+from metrics import METRICS
+from queries import (MATCH_VIEW, SUMMARY_VIEW, columns_sql, dimensions_sql,
+                     grouped_sums_sql, sums_sql)
+from schema import MATCH_FIELDS, resolve
+from snapshots import SnapshotCache
+from standings import standings
+from stats import SIDE_FIELDS, home_away_table, lookup_home_away
+from store import FrameStore, NotifyListener, Prefetcher, SingleFlight, ViewVersion, warm_pool
 
 # ─────────────────────────────────────────────────────────────
 # Page config & styling (dark main, readable sidebar widgets)
 # ─────────────────────────────────────────────────────────────
 st.set_page_config(page_title="Goalytics Dashboard", page_icon="⚽", layout="wide")
 
+run_started = time.perf_counter()
+run_trace = METRICS.begin_trace()     # this rerun's stages, for the debug panel
+
 st.markdown(
     """
     <style>
@@ -37,6 +57,8 @@ st.markdown(
       .metric-accent .metric-value { color: var(--primary); }
       .metric-green { color: var(--green) !important; }
       .metric-red { color: var(--red) !important; }
+      .card-grid { display: grid; grid-template-columns: repeat(var(--cols), minmax(0, 1fr)); gap: 1rem; margin-bottom: 1rem; }
+      @media (max-width: 640px) { .card-grid { grid-template-columns: repeat(2, minmax(0, 1fr)); } }
 
       /* Sidebar: dark pane, LIGHT controls with DARK text (universal selectors) */
       section[data-testid="stSidebar"] { background: #0a0f15; border-right: 1px solid var(--border); }
@@ -88,10 +110,19 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# ─────────────────────────────────────────────────────────────
+# Title / subtitle — painted before any database work
+# ─────────────────────────────────────────────────────────────
+st.title("Team Analytics Dashboard")
+st.markdown("Competition → season → team insights.")
+st.markdown("---")
+
 # ─────────────────────────────────────────────────────────────
 # Secrets / Env
 # ─────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
 def pick_secret(names, default=None):
+    # Resolved once per process instead of walking st.secrets + os.environ on every rerun
     for n in names:
         try:
             if n in st.secrets and str(st.secrets[n]) != "":
@@ -110,6 +141,37 @@ DB_USER    = pick_secret(["PG_USER","PGUSER"])
 DB_PASS    = pick_secret(["PG_PASSWORD","PGPASSWORD"])
 DB_SSLMODE = pick_secret(["PGSSLMODE","PG_SSLMODE"], "require")
 
+# "local" pulls the summary view into pandas; "pushdown" sends filters + SUMs to Postgres
+QUERY_MODE = (pick_secret(["GOALYTICS_QUERY_MODE","QUERY_MODE"], "local") or "local").lower()
+PUSHDOWN   = QUERY_MODE == "pushdown"
+# ETL NOTIFY channel; when set, caches live until a notification instead of being polled
+NOTIFY_CHANNEL = pick_secret(["GOALYTICS_NOTIFY_CHANNEL"])
+# How often (seconds) to probe the views for a refresh; unchanged views cost one catalog query
+REFRESH_SECONDS = float(pick_secret(["GOALYTICS_REFRESH_SECONDS"], "3600" if NOTIFY_CHANNEL else "120"))
+# Refresh log the ETL appends to (view_name, refreshed_at); makes change detection reliable
+# for REFRESH ... CONCURRENTLY and on read replicas, where the catalog write counters lag or stall
+REFRESH_LOG = pick_secret(["GOALYTICS_REFRESH_LOG"])
+# Directory shared by all replicas on a host for memory-mapped query snapshots (off when unset)
+SNAPSHOT_DIR = pick_secret(["GOALYTICS_SNAPSHOT_DIR"])
+# After a refresh, serve the previous frame while one background query fetches the new one
+SERVE_STALE = pick_secret(["GOALYTICS_SERVE_STALE"], "1").lower() not in ("0", "false", "no")
+# Max points per goals chart; longer series are downsampled with LTTB (0 = no limit)
+CHART_POINTS = int(pick_secret(["GOALYTICS_CHART_POINTS"], "500"))
+# Background threads warming match loads for neighboring selections (0 = off)
+PREFETCH_WORKERS = int(pick_secret(["GOALYTICS_PREFETCH_WORKERS"], "2"))
+# Matches in the league table's rolling form window (last-N points, goal difference trend)
+FORM_MATCHES = max(1, int(pick_secret(["GOALYTICS_FORM_MATCHES"], "5")))
+# Directory written by `python batch.py --out ...`; concrete selections read its figures while current
+ARTIFACTS_DIR = pick_secret(["GOALYTICS_ARTIFACTS_DIR"])
+# Sidebar panel with this rerun's stage timings and the cache hit ratios (or add ?debug=1 to the URL)
+DEBUG = pick_secret(["GOALYTICS_DEBUG"], "0").lower() in ("1", "true", "yes") or "debug" in st.query_params
+# Prometheus export: text file rewritten after every run (textfile collector) and/or an HTTP /metrics port.
+# Replicas on one host: put "{pid}" in the file name (one file + a pid label each); the first one binds the port
+METRICS_FILE = pick_secret(["GOALYTICS_METRICS_FILE"])
+METRICS_PORT = int(pick_secret(["GOALYTICS_METRICS_PORT"], "0"))
+# Rows per fetch from the server-side cursor; bounds peak memory of a full-view load
+FETCH_ROWS = int(pick_secret(["GOALYTICS_FETCH_ROWS"], "50000"))
+
 if not (DB_HOST and DB_USER and DB_PASS):
     st.error("❌ Database credentials not provided. Set PG_HOST/PG_PORT/PG_DB/PG_USER/PG_PASSWORD (+PGSSLMODE).")
     st.stop()
@@ -119,216 +181,223 @@ connect_args = {"sslmode": DB_SSLMODE} if DB_SSLMODE else {}
 
 @st.cache_resource(show_spinner=False)
 def get_engine():
-    return create_engine(engine_url, connect_args=connect_args, pool_pre_ping=True)
+    engine = create_engine(engine_url, connect_args=connect_args, pool_pre_ping=True)
+    # Connections for the script thread + prefetch workers open in the background
+    warm_pool(engine, 1 + PREFETCH_WORKERS)
+    return engine
 
 engine = get_engine()
 
+@st.cache_resource(show_spinner=False)
+def notify_listener():
+    # One LISTEN connection per process, on the engine from get_engine()
+    if not NOTIFY_CHANNEL:
+        return None
+    listener = NotifyListener(engine, NOTIFY_CHANNEL)
+    listener.start()
+    return listener
+
 # ─────────────────────────────────────────────────────────────
 # Helpers
 # ─────────────────────────────────────────────────────────────
-def col_pick(df, names_or_regex):
-    if df is None: return None
-    lc_map = {c.lower(): c for c in df.columns}
-    for n in names_or_regex:
-        if isinstance(n, str) and n.lower() in lc_map:
-            return lc_map[n.lower()]
-    for pat in names_or_regex:
-        rx = re.compile(pat, re.IGNORECASE)
-        for c in df.columns:
-            if rx.fullmatch(c) or rx.search(c):
-                return c
-    return None
-
-def to_num(df, cols):
-    for c in cols:
-        if c and c in df.columns and not pd.api.types.is_numeric_dtype(df[c]):
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-
-def nz(x, d=0):
-    try:
-        if pd.isna(x): return d
-        v = float(x)
-        return int(v) if abs(v - int(v)) < 1e-9 else round(v, 2)
-    except Exception:
-        return d
+# Cached frames live until the view's version token moves, then refresh incrementally
+@st.cache_resource(show_spinner=False)
+def view_version(view):
+    version = ViewVersion(engine, view, REFRESH_SECONDS, log=REFRESH_LOG)
+    listener = notify_listener()
+    if listener:
+        listener.watch(version)
+    return version
 
-def compute_home_away_stats(tm):
-    """Return two dicts: home_stats, away_stats with keys: matches,wins,draws,losses,points,gf,ga,gd"""
-    if tm is None or tm.empty:
-        return None, None
-
-    date_col = col_pick(tm, ["match_date", r".*date.*"])
-    gf_col   = col_pick(tm, ["goals_for","gf", r".*goals.*for.*"])
-    ga_col   = col_pick(tm, ["goals_against","ga", r".*goals.*against.*"])
-    pts_col  = col_pick(tm, ["points","pts", r".*point.*"])
-    res_col  = col_pick(tm, ["result", r".*\b(W|D|L)\b.*"])
-    home_flag_col = col_pick(tm, ["is_home", "home_away", "venue", r".*home.*away.*"])
-
-    if not home_flag_col or not gf_col or not ga_col:
-        return None, None
-
-    df = tm.copy()
-    if date_col and date_col in df.columns:
-        df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
-        df = df.sort_values(date_col)
-    to_num(df, [gf_col, ga_col])
-    if pts_col: to_num(df, [pts_col])
-
-    def to_is_home(x):
-        if pd.isna(x): return None
-        s = str(x).strip().lower()
-        if s in {"home","h","host","บ้าน"}: return True
-        if s in {"away","a","visitor","เยือน"}: return False
-        if s in {"true","1","t","yes","y"}: return True
-        if s in {"false","0","f","no","n"}: return False
-        return None
+@st.cache_resource(show_spinner=False)
+def frame_store(view, watermark=None, keys=()):
+    snapshots = SnapshotCache(SNAPSHOT_DIR, REFRESH_SECONDS) if SNAPSHOT_DIR else None
+    return FrameStore(engine, view, watermark, keys, version=view_version(view),
+                      snapshots=snapshots, serve_stale=SERVE_STALE, chunk_rows=FETCH_ROWS)
 
-    if df[home_flag_col].dtype == bool:
-        is_home = df[home_flag_col]
-    else:
-        is_home = df[home_flag_col].map(to_is_home)
-
-    home_df = df[is_home == True]
-    away_df = df[is_home == False]
-
-    def agg(side_df):
-        if side_df is None or side_df.empty:
-            return dict(matches=0,wins=0,draws=0,losses=0,points=0,gf=0,ga=0,gd=0)
-        gf = int(pd.to_numeric(side_df[gf_col], errors="coerce").fillna(0).sum())
-        ga = int(pd.to_numeric(side_df[ga_col], errors="coerce").fillna(0).sum())
-        matches = int(len(side_df))
-        if res_col and res_col in side_df.columns:
-            s = side_df[res_col].astype(str).str.lower()
-            wins  = int((s.str.startswith("w") | (s == "win")).sum())
-            draws = int((s.str.startswith("d") | (s == "draw")).sum())
-            losses= int((s.str.startswith("l") | (s == "loss")).sum())
-        else:
-            wins  = int((side_df[gf_col] > side_df[ga_col]).sum())
-            draws = int((side_df[gf_col] == side_df[ga_col]).sum())
-            losses= int((side_df[gf_col] < side_df[ga_col]).sum())
-        if pts_col and pts_col in side_df.columns:
-            points = int(pd.to_numeric(side_df[pts_col], errors="coerce").fillna(0).sum())
-        else:
-            points = 3*wins + 1*draws
-        return dict(matches=matches,wins=wins,draws=draws,losses=losses,points=points,gf=gf,ga=ga,gd=gf-ga)
-
-    return agg(home_df), agg(away_df)
-
-@st.cache_data(ttl=120)
-def load_summary():
-    sql = text("SELECT * FROM dw.mv_male_team_summary")
-    with engine.begin() as conn:
-        return pd.read_sql(sql, conn)
-
-@st.cache_data(ttl=120)
-def load_team_match(competition=None, season=None, team=None):
-    where = []
-    params = {}
-    if competition:
-        where.append("(competition_name = :comp OR competition_id = :comp)")
-        params["comp"] = str(competition)
-    if season:
-        where.append("(season_name = :season OR season_id = :season)")
-        params["season"] = str(season)
-    if team:
-        where.append("(team_name = :team OR team_id = :team)")
-        params["team"] = str(team)
-    clause = ("WHERE " + " AND ".join(where)) if where else ""
-    sql = text(f"""
-        SELECT *
-        FROM dw.mv_team_match
-        {clause}
-        ORDER BY match_date NULLS LAST, match_id
-    """)
+@st.cache_resource(show_spinner=False)
+def prefetcher():
+    return Prefetcher(PREFETCH_WORKERS) if PREFETCH_WORKERS > 0 else None
+
+@st.cache_resource(show_spinner=False)
+def metrics_server():
+    if not METRICS_PORT:
+        return None
     try:
+        return METRICS.serve(METRICS_PORT)
+    except OSError:
+        # Port taken, e.g. by another replica on this host: run without the endpoint (cached, no retry)
+        return None
+
+metrics_server()
+
+def counted(cache):
+    # Outside a st.cache_* decorator: counts every lookup; the cached body counts its own misses
+    def deco(fn):
+        @wraps(fn)
+        def call(*args, **kwargs):
+            METRICS.inc("goalytics_cache_requests_total", cache=cache)
+            return fn(*args, **kwargs)
+        return call
+    return deco
+
+def missed(cache):
+    METRICS.inc("goalytics_cache_misses_total", cache=cache)
+
+@st.cache_resource(show_spinner=False)
+def query_flight():
+    return SingleFlight()
+
+def read_frame(sql, params=None, prepare=None, name="sql"):
+    # Identical concurrent queries (same SQL + params) from different sessions share one round-trip
+    def run():
+        t0 = time.perf_counter()
         with engine.begin() as conn:
-            return pd.read_sql(sql, conn, params=params)
+            out = pd.read_sql(sql, conn, params=params)
+        if prepare:
+            prepare(out)
+        METRICS.query(name, time.perf_counter() - t0, len(out), footprint(out))
+        return out
+    return query_flight().do((str(sql), repr(sorted((params or {}).items()))), run)
+
+def load_summary(watermark=None, keys=(), measures=(), cols=(), labels=()):
+    # Shared frame (read-only) + the version it was loaded at; numeric coercion and dtype compaction
+    # (labels -> categoricals, measures -> small ints) run once per fetched chunk.
+    # cols is the mapped projection, so unmapped view columns never leave the database
+    return frame_store(SUMMARY_VIEW, watermark, keys).get_versioned(
+        cols, prepare=lambda f: compact(to_num(f, list(measures)), labels, measures))
+
+@st.cache_data(max_entries=4)
+def load_summary_columns(version):
+    return read_frame(columns_sql(SUMMARY_VIEW), name="summary_columns")
+
+# Pushdown mode: only the column list, the distinct slicer values and aggregate rows leave the DB
+@counted("dimensions")
+@st.cache_data(max_entries=4)
+def load_dimensions(cols, version, labels=()):
+    missed("dimensions")
+    return read_frame(dimensions_sql(SUMMARY_VIEW, cols), prepare=lambda f: compact(f, labels), name="dimensions")
+
+@counted("sums")
+@st.cache_data(max_entries=256)
+def load_sums(measures, preds, version):
+    missed("sums")
+    row = read_frame(*sums_sql(SUMMARY_VIEW, measures, preds), name="sums")
+    return row.iloc[0].to_dict() if not row.empty else {}
+
+@counted("season_sums")
+@st.cache_data(max_entries=256)
+def load_season_sums(season, measures, preds, version):
+    missed("season_sums")
+    sql, params = grouped_sums_sql(SUMMARY_VIEW, season, measures, preds)
+    # SUM(numeric) comes back as Decimal
+    return read_frame(sql, params, prepare=lambda out: to_num(out, list(measures)), name="season_sums")
+
+@st.cache_data(max_entries=4)
+def load_match_columns(version):
+    try:
+        return read_frame(columns_sql(MATCH_VIEW), name="match_columns")
     except Exception:
         return pd.DataFrame()
 
+def load_team_match(preds, cols, order=(), prepare=None):
+    # preds are typed (column, id) pairs on indexed id columns; cols is the projection
+    try:
+        return match_store().get_versioned(cols, preds, order, prepare)
+    except Exception:
+        return pd.DataFrame(), None
+
 # ─────────────────────────────────────────────────────────────
 # Load base data
 # ─────────────────────────────────────────────────────────────
-with st.spinner("Loading data…"):
-    df = load_summary()
+summary_version = view_version(SUMMARY_VIEW).current()
+df = load_summary_columns(summary_version)   # column list only; rows load lazily (summary_model)
+
+# Column mapping (flexible to naming), resolved once per column list
+summary_schema = resolve(tuple(df.columns), "summary")
+comp_col, season_col, team_col = summary_schema["comp"], summary_schema["season"], summary_schema["team"]
+comp_id_col, season_id_col, team_id_col = summary_schema["comp_id"], summary_schema["season_id"], summary_schema["team_id"]
+
+mp_col  = summary_schema["matches"]
+w_col   = summary_schema["wins"]
+d_col   = summary_schema["draws"]
+l_col   = summary_schema["losses"]
+pts_col = summary_schema["points"]
+gf_col  = summary_schema["gf"]
+ga_col  = summary_schema["ga"]
+
+overall_cols = {k: summary_schema[k] for k in SIDE_FIELDS}
+home_cols = summary_schema.group("home_", SIDE_FIELDS)
+away_cols = summary_schema.group("away_", SIDE_FIELDS)
+
+measure_cols = list(dict.fromkeys(
+    c for c in [mp_col,w_col,d_col,l_col,pts_col,gf_col,ga_col] + list(home_cols.values()) + list(away_cols.values()) if c
+))
+dim_cols = tuple(dict.fromkeys(c for c in (comp_col, season_col, team_col, comp_id_col, season_id_col, team_id_col) if c))
+label_cols = tuple(c for c in (comp_col, season_col, team_col) if c)   # stored as categoricals
+# Optional "last changed" column: refreshes then fetch only rows past it and merge on dim_cols
+summary_wm_col = summary_schema["watermark"]
+# A change column also feeds the version token: max(updated_at) moves even where the catalog doesn't
+view_version(SUMMARY_VIEW).track(summary_wm_col)
+summary_version = view_version(SUMMARY_VIEW).current()
+
+# The slicers only need the distinct dimension values: a small query, so the sidebar paints
+# before any summary rows load (pushdown mode never loads them)
+with METRICS.timed("load_dimensions"):
+    # No slicer columns mapped: nothing to query, one placeholder row leaves every slicer at (All)
+    dims_df = load_dimensions(dim_cols, summary_version, label_cols) if dim_cols else pd.DataFrame(index=[0])
+facet_dims = {"comp": comp_col, "season": season_col, "team": team_col}
+facet_keys = {"comp": comp_id_col, "season": season_id_col, "team": team_id_col}
 
-if df.empty:
+# ─────────────────────────────────────────────────────────────
+# Cascading slicers (each dropdown shows only valid combos with others)
+# ─────────────────────────────────────────────────────────────
+@counted("facets")
+@st.cache_resource(show_spinner=False, max_entries=4)
+def build_facets(_df, version, dims, keys):
+    missed("facets")
+    # One index per load_summary result (keyed by its version); options come from set intersection
+    return FacetIndex(_df, dims, keys)
+
+@counted("cube")
+@st.cache_resource(show_spinner=False, max_entries=4)
+def build_cube(_df, version, dims, keys, measures):
+    missed("cube")
+    # Local mode: every slicer combination pre-summed, so reruns are lookups. The cube indexes
+    # the summary rows itself; the sidebar's index is over the dimension rows only
+    return RollupCube(_df, FacetIndex(_df, dims, keys), measures)
+
+def summary_model():
+    # (cube, version): local mode loads the summary rows on the first section that needs them;
+    # pushdown mode has no cube and sums in Postgres
+    if PUSHDOWN:
+        return None, summary_version
+    with st.spinner("Loading data…"), METRICS.timed("load_summary"):
+        df, version = load_summary(summary_wm_col, dim_cols, tuple(measure_cols),
+                                   tuple(dict.fromkeys(dim_cols + tuple(measure_cols))), label_cols)
+    return build_cube(df, version, facet_dims, facet_keys, tuple(measure_cols)), version
+
+if not len(dims_df):                      # .empty is also True for the column-less placeholder
     st.info("ℹ️ No data in dw.mv_male_team_summary yet. Run your ETL/refresh.")
     st.stop()
 
-# Column mapping (flexible to naming)
-comp_col   = col_pick(df, ["competition_name","competition","league",r".*competition.*id.*"])
-season_col = col_pick(df, ["season_name","season",r".*season.*id.*"])
-team_col   = col_pick(df, ["team_name","team","club",r".*team.*id.*"])
-
-mp_col  = col_pick(df, ["matches","games","played","mp",r".*matches.*"])
-w_col   = col_pick(df, ["wins","w",r".*wins.*"])
-d_col   = col_pick(df, ["draws","d",r".*draws.*"])
-l_col   = col_pick(df, ["losses","l",r".*loss.*"])
-pts_col = col_pick(df, ["points","pts",r".*points.*"])
-gf_col  = col_pick(df, ["goals_for","gf","goals_scored","goals",r".*goals.*for.*"])
-ga_col  = col_pick(df, ["goals_against","ga","conceded",r".*goals.*against.*"])
-
-home_cols = {
-    "matches": col_pick(df, ["home_matches","matches_home",r".*home.*matches.*"]),
-    "wins":    col_pick(df, ["home_wins","wins_home",r".*home.*wins.*"]),
-    "draws":   col_pick(df, ["home_draws","draws_home",r".*home.*draw.*"]),
-    "losses":  col_pick(df, ["home_losses","losses_home",r".*home.*loss.*"]),
-    "points":  col_pick(df, ["home_points","points_home",r".*home.*points.*"]),
-    "gf":      col_pick(df, ["home_goals_for","goals_for_home",r".*home.*goals.*for.*"]),
-    "ga":      col_pick(df, ["home_goals_against","goals_against_home",r".*home.*goals.*against.*"]),
-}
-away_cols = {
-    "matches": col_pick(df, ["away_matches","matches_away",r".*away.*matches.*"]),
-    "wins":    col_pick(df, ["away_wins","wins_away",r".*away.*wins.*"]),
-    "draws":   col_pick(df, ["away_draws","draws_away",r".*away.*draw.*"]),
-    "losses":  col_pick(df, ["away_losses","losses_away",r".*away.*loss.*"]),
-    "points":  col_pick(df, ["away_points","points_away",r".*away.*points.*"]),
-    "gf":      col_pick(df, ["away_goals_for","goals_for_away",r".*away.*goals.*for.*"]),
-    "ga":      col_pick(df, ["away_goals_against","goals_against_away",r".*away.*goals.*against.*"]),
-}
-
-# Ensure numeric
-to_num(df, [mp_col,w_col,d_col,l_col,pts_col,gf_col,ga_col] + list(home_cols.values()) + list(away_cols.values()))
+facets = build_facets(dims_df, summary_version, facet_dims, facet_keys)
 
-# ─────────────────────────────────────────────────────────────
-# Cascading slicers (each dropdown shows only valid combos with others)
-# ─────────────────────────────────────────────────────────────
-def opts_for_comp(current_season, current_team):
-    temp = df.copy()
-    if current_season and current_season != "(All)" and season_col:
-        temp = temp[temp[season_col].astype(str) == current_season]
-    if current_team and current_team != "(All)" and team_col:
-        temp = temp[temp[team_col].astype(str) == current_team]
-    values = sorted(temp[comp_col].dropna().astype(str).unique().tolist()) if comp_col else []
-    return ["(All)"] + values
-
-def opts_for_season(current_comp, current_team):
-    temp = df.copy()
-    if current_comp and current_comp != "(All)" and comp_col:
-        temp = temp[temp[comp_col].astype(str) == current_comp]
-    if current_team and current_team != "(All)" and team_col:
-        temp = temp[temp[team_col].astype(str) == current_team]
-    values = sorted(temp[season_col].dropna().astype(str).unique().tolist()) if season_col else []
-    return ["(All)"] + values
-
-def opts_for_team(current_comp, current_season):
-    temp = df.copy()
-    if current_comp and current_comp != "(All)" and comp_col:
-        temp = temp[temp[comp_col].astype(str) == current_comp]
-    if current_season and current_season != "(All)" and season_col:
-        temp = temp[temp[season_col].astype(str) == current_season]
-    values = sorted(temp[team_col].dropna().astype(str).unique().tolist()) if team_col else []
-    return ["(All)"] + values
+def current_selection(**overrides):
+    sel = {"comp": st.session_state.get("sel_comp"),
+           "season": st.session_state.get("sel_season"),
+           "team": st.session_state.get("sel_team")}
+    sel.update(overrides)
+    return sel
 
 # Keep selections stable while options shrink/expand
 for k, default in [("sel_comp","(All)"), ("sel_season","(All)"), ("sel_team","(All)")]:
     if k not in st.session_state: st.session_state[k] = default
 
 # Compute options conditioned on the other two selections
-comp_options   = opts_for_comp(st.session_state.get("sel_season"), st.session_state.get("sel_team"))
-season_options = opts_for_season(st.session_state.get("sel_comp"), st.session_state.get("sel_team"))
-team_options   = opts_for_team(st.session_state.get("sel_comp"), st.session_state.get("sel_season"))
+comp_options   = facets.options("comp", current_selection())
+season_options = facets.options("season", current_selection())
+team_options   = facets.options("team", current_selection())
 
 # Coerce invalid selections back to "(All)"
 if st.session_state.sel_comp not in comp_options: st.session_state.sel_comp = "(All)"
@@ -340,180 +409,266 @@ with st.sidebar:
 
     sel_comp   = st.selectbox("Competition", comp_options, index=comp_options.index(st.session_state.sel_comp), key="sel_comp")
     # Recompute others after a change
-    season_options = opts_for_season(sel_comp, st.session_state.get("sel_team"))
+    season_options = facets.options("season", current_selection(comp=sel_comp))
     if st.session_state.sel_season not in season_options: st.session_state.sel_season = "(All)"
 
     sel_season = st.selectbox("Season", season_options, index=season_options.index(st.session_state.sel_season), key="sel_season")
     # Recompute teams after season change
-    team_options = opts_for_team(sel_comp, sel_season)
+    team_options = facets.options("team", current_selection(comp=sel_comp, season=sel_season))
     if st.session_state.sel_team not in team_options: st.session_state.sel_team = "(All)"
 
     sel_team   = st.selectbox("Team", team_options, index=team_options.index(st.session_state.sel_team), key="sel_team")
 
 # Apply filters (respect "(All)")
-fdf = df.copy()
-if sel_season != "(All)" and season_col:
-    fdf = fdf[fdf[season_col].astype(str) == sel_season]
-if sel_comp != "(All)" and comp_col:
-    fdf = fdf[fdf[comp_col].astype(str) == sel_comp]
-if sel_team != "(All)" and team_col:
-    fdf = fdf[fdf[team_col].astype(str) == sel_team]
-
-if fdf.empty:
+selection = {"comp": sel_comp, "season": sel_season, "team": sel_team}
+
+if facets.count(selection) == 0:
     st.info("No rows after filtering.")
     st.stop()
 
+def selection_sums(sel):
+    if PUSHDOWN:
+        return load_sums(tuple(measure_cols), facets.predicates(sel), summary_version) if measure_cols else {}
+    return summary_model()[0].totals(sel)
+
+
+# Match-view columns (shared by the trends row and Home/Away)
+match_version = view_version(MATCH_VIEW).current()
+match_schema = resolve(tuple(load_match_columns(match_version).columns), "match")
+match_dims = {  # dim -> (id column, name column) in dw.mv_team_match
+    "comp":   (match_schema["competition_id"], match_schema["competition_name"]),
+    "season": (match_schema["season_id"],      match_schema["season_name"]),
+    "team":   (match_schema["team_id"],        match_schema["team_name"]),
+}
+
+def match_predicates(sel):
+    return resolve_match_predicates(facets, match_dims, sel)
+
+match_proj  = match_schema.projection(MATCH_FIELDS)
+match_order = match_schema.projection(("date", "match_id"))
+# With an updated_at-style column, refreshes fetch only changed rows and replace them on
+# (match_id, team); otherwise a changed view reloads the cached frames in full
+match_wm_col = match_schema["watermark"]
+view_version(MATCH_VIEW).track(match_wm_col)
+match_version = view_version(MATCH_VIEW).current()
+match_keys = (match_schema["match_id"], match_schema["team_id"] or match_schema["team_name"]) \
+    if match_schema["match_id"] and (match_schema["team_id"] or match_schema["team_name"]) else ()
+match_cols = match_schema.cols
+
+def match_store():
+    return frame_store(MATCH_VIEW, match_wm_col, match_keys)
+
+def prepare_match(f):
+    # Per-chunk dtype compaction, same spec as batch.py
+    compact_match(f, match_schema)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_artifacts(root, versions, mtime):
+    # Batch-precomputed figures, used only while they match the live view versions
+    art = Artifacts.load(root)
+    return art if art is not None and art.current(dict(versions)) else None
+
+def current_artifacts():
+    if not ARTIFACTS_DIR:
+        return None
+    try:
+        mtime = os.path.getmtime(os.path.join(ARTIFACTS_DIR, MANIFEST))
+    except OSError:
+        return None
+    return load_artifacts(ARTIFACTS_DIR, ((SUMMARY_VIEW, summary_version), (MATCH_VIEW, match_version)), mtime)
+
+artifacts = current_artifacts()
+
 # ─────────────────────────────────────────────────────────────
-# Title / subtitle
+# Section models — cached on exactly the inputs each section reads
 # ─────────────────────────────────────────────────────────────
-st.title("Team Analytics Dashboard")
-st.markdown("Competition → season → team insights.")
-st.markdown("---")
+@counted("goal_series")
+@st.cache_resource(show_spinner=False, max_entries=64)
+def goal_series(_tm, preds, version, date_col, series_cols, points):
+    missed("goal_series")
+    # Date-indexed goals series for the trends row, built once per (match filter, view version)
+    # and reduced to at most `points` points each, so the chart payload is bounded on any selection
+    tm2 = _tm[[date_col, *series_cols]].copy()         # dates already datetime64 (prepare_match)
+    to_num(tm2, list(series_cols))
+    tm2 = tm2.sort_values(date_col).set_index(date_col)
+    return {c: downsample(tm2[c], points) for c in series_cols}
+
+@counted("home_away")
+@st.cache_resource(show_spinner=False, max_entries=2)
+def build_home_away(_tm, version, cols, by):
+    # Every (competition, season, team) group in one pass, once per match-view version
+    missed("home_away")
+    with METRICS.timed("home_away_table"):
+        return home_away_table(_tm, cols, by)
+
+def load_home_away():
+    cols = {k: match_cols[k] for k in HOME_AWAY_FIELDS}
+    if not cols["home"] or not cols["gf"] or not cols["ga"]:
+        return None
+    by = tuple(dict.fromkeys(c for pair in match_dims.values() for c in pair if c))
+    try:
+        all_tm, version = match_store().get_versioned(
+            by + tuple(c for c in cols.values() if c), prepare=prepare_match)
+    except Exception:
+        return None
+    return None if all_tm.empty else build_home_away(all_tm, version, cols, by)
+
+@counted("season_points")
+@st.cache_resource(show_spinner=False, max_entries=256)
+def season_points(comp, team, _cube, version):
+    missed("season_points")
+    # Points per season depend on competition + team only, so a season change reuses this
+    sel = {"comp": comp, "team": team}
+    if PUSHDOWN:
+        hist = load_season_sums(season_col, (pts_col,), facets.predicates(sel), version)
+    else:
+        hist = pd.DataFrame(
+            [{season_col: season, pts_col: v[pts_col]} for season, v in _cube.series("season", sel, (pts_col,))],
+            columns=[season_col, pts_col],
+        )
+    return season_frame(hist, season_col, pts_col)
+
+@counted("standings")
+@st.cache_resource(show_spinner=False, max_entries=32)
+def season_standings(_tm, preds, version, cols, team, order, n):
+    missed("standings")
+    # Table + rolling form for every team of one competition/season in one vectorized pass,
+    # once per (competition, season) filter and match-view version
+    with METRICS.timed("standings"):
+        return standings(_tm, cols, team, order, n)
+
+# Match rows of a whole competition/season, ordered so each team's matches are chronological
+standings_key   = "team_name" if match_cols["team_name"] else "team_id"
+standings_team  = match_cols[standings_key]
+standings_order = match_order
+standings_proj  = (match_schema.projection((standings_key, "date", "match_id", "gf", "ga", "points", "result"))
+                   if standings_team and match_cols["gf"] and match_cols["ga"] else ())
 
 # ─────────────────────────────────────────────────────────────
 # OVERALL STATS
 # ─────────────────────────────────────────────────────────────
-st.header("Overall Stats")
-
-totals = {
-    "matches": nz(fdf[mp_col].sum()) if mp_col else 0,
-    "wins":    nz(fdf[w_col].sum()) if w_col else 0,
-    "draws":   nz(fdf[d_col].sum()) if d_col else 0,
-    "losses":  nz(fdf[l_col].sum()) if l_col else 0,
-    "points":  nz(fdf[pts_col].sum()) if pts_col else 0,
-    "gf":      nz(fdf[gf_col].sum()) if gf_col else 0,
-    "ga":      nz(fdf[ga_col].sum()) if ga_col else 0,
-}
+@METRICS.timed("overall_stats")
+def overall_stats(sel):
+    st.header("Overall Stats")
 
-m1, m2, m3, m4, m5 = st.columns(5)
-for c, title in zip([m1,m2,m3,m4,m5], ["Matches","Wins","Draws","Losses","Points"]):
-    key = title.lower()
-    val = totals["matches" if key=="matches" else key]
-    accent = " metric-accent" if key == "points" else ""
-    c.markdown(f"""
-      <div class="metric-card{accent}">
-        <div class="metric-title">{title}</div>
-        <div class="metric-value">{val}</div>
-      </div>
-    """, unsafe_allow_html=True)
+    pre = artifacts.get(sel) if artifacts else None
+    overall = pre["overall"] if pre else totals(selection_sums(sel), overall_cols)
 
-# Bigger mini trends row
-tm = load_team_match(
-    competition=None if sel_comp=="(All)" else sel_comp,
-    season=None if sel_season=="(All)" else sel_season,
-    team=None if sel_team=="(All)" else sel_team,
-)
-if tm is not None and not tm.empty:
-    date_col = col_pick(tm, ["match_date", r".*date.*"])
-    gf_m_col = col_pick(tm, ["goals_for","gf", r".*goals.*for.*"])
-    ga_m_col = col_pick(tm, ["goals_against","ga", r".*goals.*against.*"])
-    g1, g2 = st.columns(2, gap="large")
-    if date_col and (gf_m_col or ga_m_col):
-        tm2 = tm.copy()
-        tm2[date_col] = pd.to_datetime(tm2[date_col], errors="coerce")
-        tm2 = tm2.sort_values(date_col)
-        if gf_m_col: to_num(tm2, [gf_m_col])
-        if ga_m_col: to_num(tm2, [ga_m_col])
-        if gf_m_col:
-            g1.markdown('<div class="metric-card"><div class="metric-title">Goals Scored</div>', unsafe_allow_html=True)
-            g1.line_chart(tm2.set_index(date_col)[gf_m_col], height=220, use_container_width=True)
-            g1.markdown('</div>', unsafe_allow_html=True)
-        if ga_m_col:
-            g2.markdown('<div class="metric-card"><div class="metric-title">Goals Conceded</div>', unsafe_allow_html=True)
-            g2.line_chart(tm2.set_index(date_col)[ga_m_col], height=220, use_container_width=True)
-            g2.markdown('</div>', unsafe_allow_html=True)
-else:
-    st.markdown(
-        '<div class="metric-card"><div class="metric-title">Goals Scored / Conceded</div>'
-        '<div class="metric-value">—</div></div>',
-        unsafe_allow_html=True
-    )
+    # One markdown delta for the whole row
+    st.markdown(grid([card(title, overall[title.lower()], accent=title == "Points")
+                      for title in ["Matches","Wins","Draws","Losses","Points"]], 5), unsafe_allow_html=True)
 
-st.markdown("---")
+# Bigger mini trends row
+@METRICS.timed("trends_row")
+def trends_row(preds):
+    tm, version = (load_team_match(preds, match_proj, match_order, prepare_match)
+                   if match_proj else (pd.DataFrame(), None))
+    if tm is not None and not tm.empty:
+        date_col = match_cols["date"]
+        gf_m_col = match_cols["gf"]
+        ga_m_col = match_cols["ga"]
+        g1, g2 = st.columns(2, gap="large")
+        if date_col and (gf_m_col or ga_m_col):
+            series = goal_series(tm, preds, version, date_col, tuple(c for c in (gf_m_col, ga_m_col) if c), CHART_POINTS)
+            if gf_m_col:
+                g1.markdown('<div class="metric-card"><div class="metric-title">Goals Scored</div>', unsafe_allow_html=True)
+                g1.line_chart(series[gf_m_col], height=220, use_container_width=True)
+                g1.markdown('</div>', unsafe_allow_html=True)
+            if ga_m_col:
+                g2.markdown('<div class="metric-card"><div class="metric-title">Goals Conceded</div>', unsafe_allow_html=True)
+                g2.line_chart(series[ga_m_col], height=220, use_container_width=True)
+                g2.markdown('</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(
+            '<div class="metric-card"><div class="metric-title">Goals Scored / Conceded</div>'
+            '<div class="metric-value">—</div></div>',
+            unsafe_allow_html=True
+        )
 
 # ─────────────────────────────────────────────────────────────
 # HOME & AWAY (with Goal Diff)
 # ─────────────────────────────────────────────────────────────
-def section_block(title, cols_map):
-    st.subheader(title)
-    r1c1, r1c2, r1c3, r1c4 = st.columns(4)
-    r2c1, r2c2, r2c3, r2c4 = st.columns(4)
-
-    def sum_or_zero(col):
-        return nz(fdf[col].sum()) if col and col in fdf.columns else 0
-
-    matches = sum_or_zero(cols_map.get("matches"))
-    wins    = sum_or_zero(cols_map.get("wins"))
-    draws   = sum_or_zero(cols_map.get("draws"))
-    losses  = sum_or_zero(cols_map.get("losses"))
-    points  = sum_or_zero(cols_map.get("points"))
-    gf_val  = sum_or_zero(cols_map.get("gf"))
-    ga_val  = sum_or_zero(cols_map.get("ga"))
-    gd_val  = nz(gf_val - ga_val)
-
-    r1c1.markdown(f'<div class="metric-card"><div class="metric-title">Matches</div><div class="metric-value">{matches}</div></div>', unsafe_allow_html=True)
-    r1c2.markdown(f'<div class="metric-card"><div class="metric-title">Wins</div><div class="metric-value">{wins}</div></div>', unsafe_allow_html=True)
-    r1c3.markdown(f'<div class="metric-card"><div class="metric-title">Draws</div><div class="metric-value">{draws}</div></div>', unsafe_allow_html=True)
-    r1c4.markdown(f'<div class="metric-card"><div class="metric-title">Losses</div><div class="metric-value">{losses}</div></div>', unsafe_allow_html=True)
-
-    r2c1.markdown(f'<div class="metric-card metric-accent"><div class="metric-title">Points</div><div class="metric-value">{points}</div></div>', unsafe_allow_html=True)
-    r2c2.markdown(f'<div class="metric-card"><div class="metric-title">Goals For</div><div class="metric-value metric-green">{gf_val}</div></div>', unsafe_allow_html=True)
-    r2c3.markdown(f'<div class="metric-card"><div class="metric-title">Goals Against</div><div class="metric-value metric-red">{ga_val}</div></div>', unsafe_allow_html=True)
-    r2c4.markdown(f'<div class="metric-card"><div class="metric-title">Goal Diff</div><div class="metric-value">{gd_val}</div></div>', unsafe_allow_html=True)
+def section_block(title, cols_map, sums):
+    render_side(title, side_totals(sums, cols_map))
 
 def render_side(title, stats):
     st.subheader(title)
-    r1c1, r1c2, r1c3, r1c4 = st.columns(4)
-    r2c1, r2c2, r2c3, r2c4 = st.columns(4)
-
-    r1c1.markdown(f'<div class="metric-card"><div class="metric-title">Matches</div><div class="metric-value">{nz(stats["matches"])}</div></div>', unsafe_allow_html=True)
-    r1c2.markdown(f'<div class="metric-card"><div class="metric-title">Wins</div><div class="metric-value">{nz(stats["wins"])}</div></div>', unsafe_allow_html=True)
-    r1c3.markdown(f'<div class="metric-card"><div class="metric-title">Draws</div><div class="metric-value">{nz(stats["draws"])}</div></div>', unsafe_allow_html=True)
-    r1c4.markdown(f'<div class="metric-card"><div class="metric-title">Losses</div><div class="metric-value">{nz(stats["losses"])}</div></div>', unsafe_allow_html=True)
-
-    r2c1.markdown(f'<div class="metric-card metric-accent"><div class="metric-title">Points</div><div class="metric-value">{nz(stats["points"])}</div></div>', unsafe_allow_html=True)
-    r2c2.markdown(f'<div class="metric-card"><div class="metric-title">Goals For</div><div class="metric-value metric-green">{nz(stats["gf"])}</div></div>', unsafe_allow_html=True)
-    r2c3.markdown(f'<div class="metric-card"><div class="metric-title">Goals Against</div><div class="metric-value metric-red">{nz(stats["ga"])}</div></div>', unsafe_allow_html=True)
-    r2c4.markdown(f'<div class="metric-card"><div class="metric-title">Goal Diff</div><div class="metric-value">{nz(stats.get("gd", nz(stats["gf"]) - nz(stats["ga"])) )}</div></div>', unsafe_allow_html=True)
+    stats = dict(stats)
+    stats.setdefault("gd", nz(stats["gf"]) - nz(stats["ga"]))
+    st.markdown(side_grid(stats, nz), unsafe_allow_html=True)
+
+@METRICS.timed("home_away")
+def home_away(sel, preds):
+    pre = artifacts.get(sel) if artifacts else None
+    if pre:
+        for title, stats in (("🏠 Home Stats", pre["home"]), ("✈️ Away Stats", pre["away"])):
+            if stats:
+                render_side(title, stats)
+        return
+
+    home_stats, away_stats = lookup_home_away(load_home_away(), preds)
+    # Summary sums back the fallback cards; a cube lookup / cached query, not a recompute
+    sums = selection_sums(sel)
+
+    if home_stats and home_stats["matches"] > 0:
+        render_side("🏠 Home Stats", home_stats)
+    elif any(home_cols.values()):
+        section_block("🏠 Home Stats", home_cols, sums)
+
+    if away_stats and away_stats["matches"] > 0:
+        render_side("✈️ Away Stats", away_stats)
+    elif any(away_cols.values()):
+        section_block("✈️ Away Stats", away_cols, sums)
 
-home_stats, away_stats = (None, None)
-if tm is not None and not tm.empty:
-    home_stats, away_stats = compute_home_away_stats(tm)
-
-if home_stats and home_stats["matches"] > 0:
-    render_side("🏠 Home Stats", home_stats)
-elif any(home_cols.values()):
-    section_block("🏠 Home Stats", home_cols)
-
-if away_stats and away_stats["matches"] > 0:
-    render_side("✈️ Away Stats", away_stats)
-elif any(away_cols.values()):
-    section_block("✈️ Away Stats", away_cols)
-
-st.markdown("---")
+# ─────────────────────────────────────────────────────────────
+# LEAGUE TABLE & FORM — standings and rolling form of the selected competition/season
+# ─────────────────────────────────────────────────────────────
+@METRICS.timed("league_table")
+def league_table(comp, season, team):
+    st.header("🏆 League Table & Form")
+    if "(All)" in (comp, season):
+        st.info("Select a competition and a season to see its league table.")
+        return
+    if not standings_proj:
+        st.info("League tables need dw.mv_team_match with team and goals columns.")
+        return
+
+    preds = match_predicates({"comp": comp, "season": season, "team": "(All)"})
+    tm, version = load_team_match(preds, standings_proj, standings_order, prepare_match)
+    if tm is None or tm.empty:
+        st.info("No matches found for this competition and season.")
+        return
+    cols = {k: match_cols[k] for k in ("gf", "ga", "points", "result")}
+    table, form = season_standings(tm, preds, version, cols, standings_team, standings_order, FORM_MATCHES)
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
+    if team == "(All)":
+        return
+    key = facets.value("team", team) if match_cols["team_name"] else (facets.ids("team", team) or [None])[0]
+    mine = form[form["team"] == key]
+    if mine.empty:
+        return
+    last_n, gd_n = f"Last {FORM_MATCHES} pts", f"GD (last {FORM_MATCHES})"
+    now = mine.iloc[-1]
+    st.markdown(grid([card(last_n, nz(now[last_n]), accent=True), card(gd_n, nz(now[gd_n])),
+                      card("Win streak", nz(now["Win streak"])), card("Unbeaten", nz(now["Unbeaten"]))], 4),
+                unsafe_allow_html=True)
+    date_col = match_cols["date"]
+    if date_col:
+        trend = mine[[date_col, last_n, gd_n]]
+        st.line_chart(trend.set_index(date_col), height=220, use_container_width=True)
 
 # ─────────────────────────────────────────────────────────────
 # HISTORICAL TRENDS — Points per Season (for current selection)
 # ─────────────────────────────────────────────────────────────
-st.header("📈 Historical Trends")
-
-hist = df.copy()
-if sel_comp != "(All)" and comp_col:
-    hist = hist[hist[comp_col].astype(str) == sel_comp]
-if sel_team != "(All)" and team_col:
-    hist = hist[hist[team_col].astype(str) == sel_team]
-
-if not hist.empty and season_col and pts_col:
-    to_num(hist, [pts_col])
-    points_by_season = (
-        hist[[season_col, pts_col]]
-        .groupby(season_col, as_index=False)
-        .sum(numeric_only=True)
-        .sort_values(season_col)
-        .rename(columns={season_col: "Season", pts_col: "Points"})
-    ).set_index("Season")
-
-    if not points_by_season.empty:
+@METRICS.timed("historical_trends")
+def historical_trends(comp, team):
+    st.header("📈 Historical Trends")
+
+    points_by_season = artifacts.points_by_season(comp, team) if artifacts else None
+    if points_by_season is None and season_col and pts_col:
+        points_by_season = season_points(comp, team, *summary_model())
+    if points_by_season is not None and not points_by_season.empty:
         last_season = points_by_season.index[-1]
         last_val = int(points_by_season.iloc[-1]["Points"])
         delta = 0
@@ -524,11 +679,88 @@ if not hist.empty and season_col and pts_col:
                   delta=f"{delta} vs prev season" if len(points_by_season) >= 2 else None)
 
         st.area_chart(points_by_season, y="Points", use_container_width=True, height=260)
-else:
-    st.info("No seasonal points found for the current selection.")
+    else:
+        st.info("No seasonal points found for the current selection.")
+
+# ─────────────────────────────────────────────────────────────
+# Render — every rerun runs the whole script; each section only looks up the cached models for its inputs
+# ─────────────────────────────────────────────────────────────
+match_preds = match_predicates(selection)
+
+overall_stats(selection)
+trends_row(match_preds)
+st.markdown("---")
+home_away(selection, match_preds)
+st.markdown("---")
+league_table(sel_comp, sel_season, sel_team)
+st.markdown("---")
+historical_trends(sel_comp, sel_team)
+
+# ─────────────────────────────────────────────────────────────
+# Prefetch — warm the match loads the next click most likely needs
+# ─────────────────────────────────────────────────────────────
+PREFETCH_LIMIT = 12
+
+def nearest(options, current, limit=PREFETCH_LIMIT):
+    # Up to `limit` concrete options, nearest the current one first (list order under "(All)");
+    # only the window around it is ranked, so thousands of teams cost no more than a dozen
+    opts = [o for o in options if o != "(All)"]
+    if current not in opts:
+        return opts[:limit]
+    i = opts.index(current)
+    window = sorted((j for j in range(max(0, i - limit), min(len(opts), i + limit + 1)) if j != i),
+                    key=lambda j: abs(j - i))
+    return [opts[j] for j in window[:limit]]
+
+def neighbor_selections(sel):
+    # Other seasons of the selected team, then the other teams of the selected competition/season
+    out = [dict(sel, season=s) for s in nearest(facets.options("season", sel), sel["season"])] if sel["team"] != "(All)" else []
+    out += [dict(sel, team=t) for t in nearest(facets.options("team", sel), sel["team"])]
+    return out[:PREFETCH_LIMIT]
+
+def prefetch_neighbors(sel):
+    pool = prefetcher()
+    if pool is None or not match_proj:
+        return
+    store = match_store()
+    for nsel in neighbor_selections(sel):
+        preds = match_predicates(nsel)
+        if not store.cached(match_proj, preds, match_order):
+            pool.submit((MATCH_VIEW, preds),
+                        lambda preds=preds: store.prefetch(match_proj, preds, match_order, prepare_match))
+
+with METRICS.timed("prefetch_submit"):
+    prefetch_neighbors(selection)
 
 # ─────────────────────────────────────────────────────────────
 # Footer
 # ─────────────────────────────────────────────────────────────
 st.caption(f"Connected to {DB_HOST}:{DB_PORT}/{DB_NAME} as {DB_USER} (sslmode={DB_SSLMODE}). "
            f"Sources: dw.mv_male_team_summary (+ dw.mv_team_match if present).")
+
+# ─────────────────────────────────────────────────────────────
+# Instrumentation — debug panel + Prometheus export
+# ─────────────────────────────────────────────────────────────
+METRICS.observe("goalytics_stage_seconds", time.perf_counter() - run_started, stage="run")
+METRICS.note("run", time.perf_counter() - run_started)
+
+# Each store sizes a frame once when it loads it (and updates the gauge then); this only adds up
+cached_bytes = sum(s.nbytes() for v in (SUMMARY_VIEW, MATCH_VIEW) for s in view_version(v).stores)
+if METRICS_FILE:
+    try:
+        if "{pid}" in METRICS_FILE:
+            METRICS.write(METRICS_FILE.replace("{pid}", str(os.getpid())), (("pid", str(os.getpid())),))
+        else:
+            METRICS.write(METRICS_FILE)
+    except OSError:
+        pass
+
+if DEBUG:
+    with st.sidebar.expander("⏱ Performance", expanded=True):
+        st.caption("This run (ms)")
+        st.dataframe(pd.DataFrame(run_trace), hide_index=True, use_container_width=True)
+        st.caption("Cache hit ratio (since process start)")
+        st.dataframe(pd.DataFrame([{"cache": c, "lookups": n, "hit %": round(100 * r, 1)}
+                                   for c, (n, r) in METRICS.hit_ratios().items()]),
+                     hide_index=True, use_container_width=True)
+        st.caption(f"Cached frames: {cached_bytes / 2**20:.1f} MiB")
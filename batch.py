@@ -0,0 +1,162 @@
+# batch.py — precompute every team's dashboard figures after an ETL run (no Streamlit)
+#
+#   python batch.py --out artifacts/                  # PG_* / PGSSLMODE from the environment
+#   python batch.py --out artifacts/ --workers 8 --format both
+#
+# Writes records.json (what the app reads when GOALYTICS_ARTIFACTS_DIR points here),
+# overall / home_away / points_by_season Parquet tables for analysts (needs pyarrow),
+# and manifest.json with the view versions the figures were computed at (probed like the
+# app's, including GOALYTICS_REFRESH_LOG from the environment, so the app can match them).
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from dtypes import compact, compact_match, to_num
+from figures import MANIFEST, Figures, token_json
+from queries import MATCH_VIEW, SUMMARY_VIEW, columns_sql
+from schema import SUMMARY_MEASURES, resolve
+from store import FrameStore, ViewVersion
+
+try:  # optional, same as snapshots.py
+    import pyarrow  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+_figures = None   # per worker process, built once by _init
+
+
+def engine_from_env(dsn=None):
+    if dsn:
+        return create_engine(dsn, pool_pre_ping=True)
+    env = lambda *names, default=None: next((os.environ[n] for n in names if os.environ.get(n)), default)
+    host, user, pw = env("PG_HOST", "PGHOST"), env("PG_USER", "PGUSER"), env("PG_PASSWORD", "PGPASSWORD")
+    if not (host and user and pw):
+        sys.exit("Set PG_HOST/PG_PORT/PG_DB/PG_USER/PG_PASSWORD (+PGSSLMODE) or pass --dsn.")
+    url = (f"postgresql+psycopg2://{user}:{pw}@{host}:{env('PG_PORT', 'PGPORT', default='5432')}"
+           f"/{env('PG_DB', 'PGDATABASE', default='postgres')}")
+    sslmode = env("PGSSLMODE", "PG_SSLMODE", default="require")
+    return create_engine(url, connect_args={"sslmode": sslmode} if sslmode else {}, pool_pre_ping=True)
+
+
+def view_version(engine, view, kind, log=None):
+    """(ViewVersion set up like the app's, so tokens match; the view's resolved Schema)."""
+    with engine.connect() as conn:
+        schema = resolve(tuple(pd.read_sql(columns_sql(view), conn).columns), kind)
+    version = ViewVersion(engine, view, log=log)
+    version.track(schema["watermark"])
+    return version, schema
+
+
+def load(engine, fetch_rows, log=None):
+    """(summary, match frame or None, {view: version token}), streamed and compacted like the app.
+
+    Every fetched chunk is coerced and compacted before the next one arrives (the app's
+    load_summary prepare, dtypes.compact_match), so the full frames never exist as Python objects.
+    """
+    version, s = view_version(engine, SUMMARY_VIEW, "summary", log)
+    versions = {SUMMARY_VIEW: version.probe()}
+    labels, measures = s.projection(("comp", "season", "team")), s.projection(SUMMARY_MEASURES)
+    summary = FrameStore(engine, SUMMARY_VIEW, version=version, chunk_rows=fetch_rows).get(
+        prepare=lambda f: compact(to_num(f, measures), labels, measures))
+    try:
+        version, m = view_version(engine, MATCH_VIEW, "match", log)
+        versions[MATCH_VIEW] = version.probe()
+        tm = FrameStore(engine, MATCH_VIEW, version=version, chunk_rows=fetch_rows).get(
+            prepare=lambda f: compact_match(f, m))
+    except Exception:
+        tm, versions[MATCH_VIEW] = None, None
+    return summary, tm, versions
+
+
+def _init(summary, tm):
+    global _figures
+    _figures = Figures(summary, tm)
+
+
+def _records(combos):
+    return [_figures.record(*c) for c in combos]
+
+
+def chunks(items, n):
+    return [items[i:i + n] for i in range(0, len(items), n)]
+
+
+def run(figures, summary, tm, workers, chunk):
+    combos = figures.combos()
+    if workers <= 1:
+        return [figures.record(*c) for c in combos]
+    # Each worker gets the frames once (initializer) and rebuilds its own index/cube/table
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(summary, tm)) as pool:
+        return [r for part in pool.map(_records, chunks(combos, chunk)) for r in part]
+
+
+def tables(records):
+    """Flat overall / home_away / points_by_season frames from the records."""
+    keys = ("competition", "season", "team")
+    overall = pd.DataFrame([{**{k: r[k] for k in keys}, **r["overall"]} for r in records])
+    home_away = pd.DataFrame([{**{k: r[k] for k in keys}, "side": side, **r[side]}
+                              for r in records for side in ("home", "away") if r[side]])
+    seen, pbs = set(), []
+    for r in records:
+        if (r["competition"], r["team"]) not in seen:
+            seen.add((r["competition"], r["team"]))
+            pbs += [{"competition": r["competition"], "team": r["team"], **p} for p in r["points_by_season"]]
+    return {"overall": overall, "home_away": home_away, "points_by_season": pd.DataFrame(pbs)}
+
+
+def write(out, records, versions, fmt):
+    os.makedirs(out, exist_ok=True)
+    files = ["records.json"]
+    with open(os.path.join(out, "records.json.tmp"), "w") as f:
+        json.dump(records, f, default=str)
+    os.replace(os.path.join(out, "records.json.tmp"), os.path.join(out, "records.json"))
+    if fmt in ("parquet", "both"):
+        if pyarrow is None:
+            print("pyarrow not installed: skipping Parquet output", file=sys.stderr)
+        else:
+            for name, frame in tables(records).items():
+                frame.to_parquet(os.path.join(out, f"{name}.parquet"), index=False)
+                files.append(f"{name}.parquet")
+    if fmt in ("json", "both"):
+        for name, frame in tables(records).items():
+            frame.to_json(os.path.join(out, f"{name}.json"), orient="records")
+            files.append(f"{name}.json")
+    # Manifest last: the app only picks up a directory whose manifest matches the live views
+    manifest = {"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "records": "records.json",
+                "count": len(records), "files": files,
+                "versions": {v: token_json(t) for v, t in versions.items()}}
+    with open(os.path.join(out, MANIFEST + ".tmp"), "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(os.path.join(out, MANIFEST + ".tmp"), os.path.join(out, MANIFEST))
+    return manifest
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Precompute dashboard figures for every competition/season/team")
+    p.add_argument("--out", required=True, help="artifact directory (GOALYTICS_ARTIFACTS_DIR for the app)")
+    p.add_argument("--dsn", help="SQLAlchemy URL; defaults to the PG_* environment variables")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--chunk", type=int, default=200, help="selections per worker task")
+    p.add_argument("--format", choices=("parquet", "json", "both"), default="parquet",
+                   help="tables to write next to records.json")
+    p.add_argument("--fetch-rows", type=int, default=50_000)
+    args = p.parse_args(argv)
+
+    t0 = time.perf_counter()
+    engine = engine_from_env(args.dsn)
+    summary, tm, versions = load(engine, args.fetch_rows, os.environ.get("GOALYTICS_REFRESH_LOG"))
+    engine.dispose()
+    figures = Figures(summary, tm)
+    records = run(figures, summary, tm, args.workers, args.chunk)
+    manifest = write(args.out, records, versions, args.format)
+    print(f"{manifest['count']:,} selections -> {args.out} in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+# bench.py — reproducible headless benchmarks on synthetic data (no Streamlit imports)
+#
+#   python bench.py --leagues 4 --seasons 5 --teams 20                 # in-memory paths only
+#   python bench.py --dsn postgresql+psycopg2://user:pw@localhost/db   # + loaders against Postgres
+#   python bench.py ... --json run.json --compare baseline.json        # save / diff runs
+#
+# With --dsn the synthetic views are written as tables into --schema (default
+# goalytics_bench, recreated on start and dropped at the end unless --keep), never into dw.
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from cube import RollupCube
+from downsample import downsample
+from dtypes import compact, footprint
+from facets import ALL, FacetIndex
+from queries import dimensions_sql, qi, sums_sql
+from schema import SUMMARY_MEASURES, resolve
+from standings import standings
+from stats import home_away_table, lookup_home_away
+
+DIMS = {"comp": "competition_name", "season": "season_name", "team": "team_name"}
+KEYS = {"comp": "competition_id", "season": "season_id", "team": "team_id"}
+LABELS = ("competition_name", "season_name", "team_name")
+COUNTS = ("matches", "wins", "draws", "losses", "points", "goals_for", "goals_against")
+
+
+# ─────────────────────────────────────────────────────────────
+# Synthetic data
+# ─────────────────────────────────────────────────────────────
+def generate(leagues=4, seasons=5, teams=20, rounds=1, seed=7):
+    """(summary, match) frames shaped like dw.mv_male_team_summary / dw.mv_team_match.
+
+    Every league-season is a `rounds`-fold double round robin, so each team plays
+    2 * rounds * (teams - 1) matches a season. Same seed -> same data.
+    """
+    rng = np.random.default_rng(seed)
+    home, away = np.nonzero(~np.eye(teams, dtype=bool))
+    home, away = np.tile(home, rounds), np.tile(away, rounds)
+    n_fix = len(home)
+    parts = []
+    for lg in range(leagues):
+        for sn in range(seasons):
+            start = np.datetime64(f"{2015 + sn}-08-01")
+            days = np.sort(rng.integers(0, 290, n_fix))
+            parts.append(pd.DataFrame({
+                "competition_id": lg + 1, "season_id": sn + 1,
+                "home_id": lg * teams + home + 1, "away_id": lg * teams + away + 1,
+                "match_date": start + days.astype("timedelta64[D]"),
+                "hg": rng.poisson(1.5, n_fix), "ag": rng.poisson(1.1, n_fix),
+            }))
+    fx = pd.concat(parts, ignore_index=True)
+    fx["match_id"] = np.arange(1, len(fx) + 1)
+
+    def side(is_home):
+        own, opp = ("home_id", "away_id") if is_home else ("away_id", "home_id")
+        gf, ga = (fx["hg"], fx["ag"]) if is_home else (fx["ag"], fx["hg"])
+        res = np.where(gf > ga, "W", np.where(gf == ga, "D", "L"))
+        return pd.DataFrame({
+            "match_id": fx["match_id"], "match_date": fx["match_date"],
+            "competition_id": fx["competition_id"], "season_id": fx["season_id"], "team_id": fx[own],
+            "opponent_id": fx[opp], "is_home": is_home, "goals_for": gf, "goals_against": ga,
+            "result": res, "points": np.select([res == "W", res == "D"], [3, 1], 0),
+        })
+    tm = pd.concat([side(True), side(False)], ignore_index=True).sort_values(["match_date", "match_id"], ignore_index=True)
+    tm["competition_name"] = "League " + tm["competition_id"].astype(str)
+    tm["season_name"] = (2014 + tm["season_id"]).astype(str) + "/" + (2015 + tm["season_id"]).astype(str)
+    tm["team_name"] = "Team " + tm["team_id"].astype(str).str.zfill(4)
+
+    keys = ["competition_id", "competition_name", "season_id", "season_name", "team_id", "team_name"]
+    tally = tm.assign(matches=1, wins=tm["result"].eq("W"), draws=tm["result"].eq("D"), losses=tm["result"].eq("L"))
+    summary = tally.groupby(keys, sort=True)[list(COUNTS)].sum()
+    for prefix, flag in (("home_", True), ("away_", False)):
+        s = tally[tally["is_home"] == flag].groupby(keys)[list(COUNTS)].sum()
+        summary = summary.join(s.add_prefix(prefix))
+    return summary.fillna(0).astype(int).reset_index(), tm
+
+
+def selections(facets, n, seed=11):
+    """`n` reproducible slicer states, each dimension "(All)" about a third of the time."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        sel = {}
+        for dim in facets.dims:
+            labels = facets.options(dim, sel)[1:]
+            sel[dim] = ALL if not labels or rng.random() < 0.33 else labels[rng.integers(len(labels))]
+        out.append(sel)
+    return out
+
+
+# ─────────────────────────────────────────────────────────────
+# Postgres stand-in
+# ─────────────────────────────────────────────────────────────
+def load_pg(engine, schema, summary, tm):
+    """Recreate `schema` with the two views as indexed tables (COPY, not INSERTs)."""
+    from sqlalchemy import text
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {qi(schema)} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {qi(schema)}"))
+    for name, frame in (("mv_male_team_summary", summary), ("mv_team_match", tm)):
+        frame.head(0).to_sql(name, engine, schema=schema, index=False)
+        buf = io.StringIO()
+        frame.to_csv(buf, index=False, header=False)
+        buf.seek(0)
+        raw = engine.raw_connection()
+        try:
+            with raw.cursor() as cur:
+                cur.copy_expert(f"COPY {qi(schema)}.{qi(name)} FROM STDIN WITH (FORMAT csv)", buf)
+            raw.commit()
+        finally:
+            raw.close()
+    with engine.begin() as conn:
+        for col in ("competition_id", "season_id", "team_id", "match_id"):
+            conn.execute(text(f"CREATE INDEX ON {qi(schema)}.mv_team_match ({qi(col)})"))
+        conn.execute(text(f"ANALYZE {qi(schema)}.mv_male_team_summary"))
+        conn.execute(text(f"ANALYZE {qi(schema)}.mv_team_match"))
+
+
+# ─────────────────────────────────────────────────────────────
+# Harness
+# ─────────────────────────────────────────────────────────────
+def measure(name, fn, units, unit, repeat):
+    """Median/min wall time over `repeat` runs, then one tracemalloc run for peak memory."""
+    fn()                                       # warm-up (imports, first-touch allocations)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    med = statistics.median(times)
+    return {"name": name, "median_ms": med * 1000, "min_ms": min(times) * 1000,
+            "throughput": units / med if med else float("inf"), "unit": unit, "peak_mib": peak / 2**20}
+
+
+def run(args):
+    t0 = time.perf_counter()
+    summary, tm = generate(args.leagues, args.seasons, args.teams, args.rounds, args.seed)
+    print(f"generated {len(summary):,} summary rows, {len(tm):,} match rows in {time.perf_counter() - t0:.2f}s",
+          file=sys.stderr)
+    raw_bytes = {"summary": footprint(summary), "match": footprint(tm)}
+    summary = compact(summary.copy(), LABELS, [c for c in summary.columns if c not in KEYS.values() and c not in LABELS])
+    tm = compact(tm.copy(), LABELS + ("result",), ("goals_for", "goals_against", "points"), ("match_date",))
+    memory = {k: {"raw_mib": raw_bytes[k] / 2**20, "compact_mib": footprint(f) / 2**20}
+              for k, f in (("summary", summary), ("match", tm))}
+
+    schema = resolve(tuple(summary.columns), "summary")
+    measures = schema.projection(SUMMARY_MEASURES)
+    facets = FacetIndex(summary, DIMS, KEYS)
+    sels = selections(facets, args.selections, args.seed)
+    n = len(sels)
+    results = []
+    add = lambda *a: results.append(measure(*a, repeat=args.repeat))
+
+    # Cascading slicers: index build, then cold options (memo cleared) for every selection
+    add("facets.build", lambda: FacetIndex(summary, DIMS, KEYS), len(summary), "rows/s")
+
+    def options():
+        facets._memo.clear()
+        for sel in sels:
+            for dim in facets.dims:
+                facets.options(dim, sel)
+    add("facets.options", options, n, "selections/s")
+
+    # Filtering + totals: the old per-rerun pandas mask vs the rollup cube
+    def pandas_filter():
+        for sel in sels:
+            mask = np.ones(len(summary), dtype=bool)
+            for dim, col in DIMS.items():
+                if sel[dim] != ALL:
+                    mask &= (summary[col].astype(str) == sel[dim]).to_numpy()
+            summary.loc[mask, list(measures)].sum()
+    add("filter.pandas", pandas_filter, n, "selections/s")
+    add("cube.build", lambda: RollupCube(summary, facets, measures), len(summary), "rows/s")
+    cube = RollupCube(summary, facets, measures)
+    add("cube.totals", lambda: [cube.totals(sel) for sel in sels], n, "selections/s")
+    add("cube.series", lambda: [cube.series("season", sel, ("points",)) for sel in sels], n, "selections/s")
+
+    # Home / away: the all-groups table once per version, then one lookup per selection
+    mcols = {"gf": "goals_for", "ga": "goals_against", "points": "points", "result": "result", "home": "is_home"}
+    by = tuple(KEYS.values()) + LABELS
+    add("home_away.table", lambda: home_away_table(tm, mcols, by), len(tm), "rows/s")
+    table = home_away_table(tm, mcols, by)
+    preds = [facets.predicates(sel) for sel in sels]
+    add("home_away.lookup", lambda: [lookup_home_away(table, p) for p in preds], n, "selections/s")
+
+    # League table + rolling form: one vectorized pass per competition/season (what one cache entry holds)
+    seasons = [g for _, g in tm.groupby(["competition_id", "season_id"], sort=False)]
+    add("standings.season", lambda: [standings(g, mcols, "team_name", ("match_date", "match_id"), 5)
+                                     for g in seasons], len(tm), "rows/s")
+
+    # Trends: the unfiltered goals series (largest chart payload), sorted and downsampled
+    def trends():
+        s = tm[["match_date", "goals_for"]]
+        s = s.sort_values("match_date").set_index("match_date")["goals_for"]
+        return downsample(s, args.chart_points)
+    add("trends.series", trends, len(tm), "rows/s")
+
+    if args.dsn:
+        results += run_pg(args, summary, tm, sels, facets, measures)
+
+    meta = {"leagues": args.leagues, "seasons": args.seasons, "teams": args.teams, "rounds": args.rounds,
+            "seed": args.seed, "selections": n, "repeat": args.repeat, "summary_rows": len(summary),
+            "match_rows": len(tm), "python": platform.python_version(), "pandas": pd.__version__,
+            "numpy": np.__version__, "memory": memory}
+    return {"meta": meta, "results": results}
+
+
+def run_pg(args, summary, tm, sels, facets, measures):
+    from sqlalchemy import create_engine
+
+    from store import FrameStore, ViewVersion
+    engine = create_engine(args.dsn, pool_pre_ping=True)
+    t0 = time.perf_counter()
+    load_pg(engine, args.schema, summary, tm)
+    print(f"loaded {args.schema} in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    sview, mview = f"{qi(args.schema)}.mv_male_team_summary", f"{qi(args.schema)}.mv_team_match"
+
+    def store(view):
+        # A fresh store per call so every repeat hits the database
+        return FrameStore(engine, view, version=ViewVersion(engine, view, interval=3600),
+                          chunk_rows=args.fetch_rows, serve_stale=False)
+    prep_s = lambda f: compact(f, LABELS, measures)
+    prep_m = lambda f: compact(f, LABELS + ("result",), ("goals_for", "goals_against", "points"), ("match_date",))
+    match_cols = ("match_date", "goals_for", "goals_against", "points", "result", "is_home")
+    team_ids = [(("team_id", int(t)),) for t in summary["team_id"].drop_duplicates().head(args.selections)]
+
+    out = []
+    add = lambda *a: out.append(measure(*a, repeat=args.repeat))
+    add("pg.load_summary", lambda: store(sview).get(prepare=prep_s), len(summary), "rows/s")
+    # Cold start: the sidebar's distinct-dimensions query vs the full summary load above
+    dim_cols = tuple(KEYS.values()) + LABELS
+    add("pg.load_dimensions", lambda: pd.read_sql(dimensions_sql(sview, dim_cols), engine), len(summary), "rows/s")
+    add("pg.load_match_all", lambda: store(mview).get(match_cols, (), ("match_date", "match_id"), prep_m),
+        len(tm), "rows/s")
+
+    def per_team():
+        s = store(mview)
+        for p in team_ids:
+            s.get(match_cols, p, ("match_date", "match_id"), prep_m)
+    add("pg.load_match_team", per_team, len(team_ids), "loads/s")
+
+    def pushdown():
+        with engine.connect() as conn:
+            for sel in sels:
+                conn.execute(*sums_sql(sview, measures, facets.predicates(sel))).first()
+    add("pg.pushdown_sums", pushdown, len(sels), "selections/s")
+    if not args.keep:
+        from sqlalchemy import text
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {qi(args.schema)} CASCADE"))
+    engine.dispose()
+    return out
+
+
+def report(run, baseline=None):
+    base = {r["name"]: r for r in (baseline or {}).get("results", [])}
+    m = run["meta"]
+    print(f"\n{m['leagues']} leagues x {m['seasons']} seasons x {m['teams']} teams x {m['rounds']} rounds "
+          f"-> {m['summary_rows']:,} summary / {m['match_rows']:,} match rows, {m['selections']} selections, "
+          f"median of {m['repeat']}")
+    for k, v in m["memory"].items():
+        print(f"  {k:<8} frame: {v['raw_mib']:8.2f} MiB raw -> {v['compact_mib']:8.2f} MiB compact")
+    head = f"\n{'path':<20}{'median ms':>12}{'min ms':>10}{'throughput':>16}  {'unit':<13}{'peak MiB':>9}"
+    print(head + ("  time/unit vs baseline" if base else ""))
+    for r in run["results"]:
+        line = (f"{r['name']:<20}{r['median_ms']:>12.2f}{r['min_ms']:>10.2f}{r['throughput']:>16,.0f}  "
+                f"{r['unit']:<13}{r['peak_mib']:>9.2f}")
+        b = base.get(r["name"])
+        if b:
+            line += f"  {(b['throughput'] / r['throughput'] - 1) * 100:+7.1f}%"
+        print(line)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Goalytics benchmark on synthetic data")
+    p.add_argument("--leagues", type=int, default=4)
+    p.add_argument("--seasons", type=int, default=5)
+    p.add_argument("--teams", type=int, default=20)
+    p.add_argument("--rounds", type=int, default=1, help="double round robins per league-season")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--selections", type=int, default=200, help="random slicer states per path")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--chart-points", type=int, default=500)
+    p.add_argument("--fetch-rows", type=int, default=50_000)
+    p.add_argument("--dsn", help="SQLAlchemy URL of a scratch Postgres; enables the loader paths")
+    p.add_argument("--schema", default="goalytics_bench")
+    p.add_argument("--keep", action="store_true", help="leave the --schema tables in place afterwards")
+    p.add_argument("--json", help="write results here")
+    p.add_argument("--compare", help="earlier --json output to diff against")
+    args = p.parse_args(argv)
+
+    result = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# cards.py — metric card grids as single HTML blocks (no Streamlit imports)
+from html import escape
+
+# Bound format methods: the templates are parsed once, at import
+_CARD = ('<div class="metric-card{accent}"><div class="metric-title">{title}</div>'
+         '<div class="metric-value{tone}">{value}</div></div>').format
+_GRID = '<div class="card-grid" style="--cols:{cols}">{cards}</div>'.format
+
+# (title, stats key, accent, tone) for the 8-card home / away grids
+SIDE_CARDS = (
+    ("Matches", "matches", False, ""),
+    ("Wins", "wins", False, ""),
+    ("Draws", "draws", False, ""),
+    ("Losses", "losses", False, ""),
+    ("Points", "points", True, ""),
+    ("Goals For", "gf", False, " metric-green"),
+    ("Goals Against", "ga", False, " metric-red"),
+    ("Goal Diff", "gd", False, ""),
+)
+
+
+def card(title, value, accent=False, tone=""):
+    return _CARD(accent=" metric-accent" if accent else "", title=escape(str(title)),
+                 tone=tone, value=escape(str(value)))
+
+
+def grid(cards, cols):
+    """One CSS-grid block of `cards` (HTML strings), `cols` per row."""
+    return _GRID(cols=int(cols), cards="".join(cards))
+
+
+def side_grid(stats, fmt=str):
+    """The 8-card block for one side; `fmt` formats each stats value."""
+    return grid([card(title, fmt(stats[key]), accent, tone) for title, key, accent, tone in SIDE_CARDS], 4)
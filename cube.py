@@ -0,0 +1,81 @@
+# cube.py — pre-aggregated rollup cube over the slicer dimensions
+import itertools
+
+import numpy as np
+
+from facets import ALL
+
+
+class RollupCube:
+    """Measure sums for every competition/season/team combination, "(All)" included.
+
+    Cells are addressed by a mixed-radix int64 key over the FacetIndex codes, where
+    each dimension's extra top code means "(All)". All 2^d grouping sets are built
+    once per summary load with bincount; keys live in one sorted array next to a
+    float64 measure matrix, so a rerun is a couple of binary searches.
+    """
+
+    def __init__(self, df, facets, measures):
+        self.facets = facets
+        self.dims = list(facets.dims)
+        self.measures = list(measures)
+        self.col = {m: i for i, m in enumerate(self.measures)}
+        self.sizes = [len(facets.labels[d]) + 1 for d in self.dims]       # last code = (All)
+
+        values = np.nan_to_num(df[self.measures].to_numpy(dtype=float)) if self.measures \
+            else np.zeros((len(df), 0))
+        codes = [facets.codes[d].astype(np.int64) for d in self.dims]
+        keys, sums = [], []
+        for kept in itertools.product((False, True), repeat=len(self.dims)):
+            mask = np.ones(len(df), dtype=bool)
+            key = np.zeros(len(df), dtype=np.int64)
+            for c, size, keep in zip(codes, self.sizes, kept):
+                if keep:
+                    mask &= c >= 0                       # NULL labels only roll up into (All)
+                key = key * size + (c if keep else size - 1)
+            uniq, inv = np.unique(key[mask], return_inverse=True)
+            vals = values[mask]
+            keys.append(uniq)
+            sums.append(np.column_stack([np.bincount(inv, weights=vals[:, j], minlength=len(uniq))
+                                         for j in range(vals.shape[1])]) if vals.shape[1]
+                        else np.zeros((len(uniq), 0)))
+        keys = np.concatenate(keys)
+        order = np.argsort(keys)
+        self.keys = keys[order]
+        self.sums = np.concatenate(sums)[order]
+
+    def _key(self, sel):
+        key = 0
+        for d, size in zip(self.dims, self.sizes):
+            v = sel.get(d)
+            if not v or v == ALL:
+                code = size - 1
+            else:
+                code = self.facets.lookup[d].get(v)
+                if code is None:
+                    return None
+            key = key * size + code
+        return key
+
+    def _cell(self, sel):
+        key = self._key(sel)
+        if key is None:
+            return None
+        i = int(np.searchsorted(self.keys, key))
+        return i if i < len(self.keys) and self.keys[i] == key else None
+
+    def totals(self, sel):
+        """{measure: sum} for the selection (zeros when nothing matches)."""
+        i = self._cell(sel)
+        row = self.sums[i] if i is not None else np.zeros(len(self.measures))
+        return {m: row[j] for m, j in self.col.items()}
+
+    def series(self, dim, sel, measures):
+        """[(typed value of `dim`, {measure: sum}), ...] for every value of `dim` under `sel`."""
+        out = []
+        for label in self.facets.labels.get(dim, []):
+            i = self._cell({**sel, dim: label})
+            if i is not None:
+                out.append((self.facets.value(dim, label),
+                            {m: self.sums[i, self.col[m]] for m in measures}))
+        return out
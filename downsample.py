@@ -0,0 +1,41 @@
+# downsample.py — bounded-size chart series (Largest-Triangle-Three-Buckets), no Streamlit imports
+import numpy as np
+import pandas as pd
+
+
+def lttb(x, y, n):
+    """Positions of the `n` points LTTB keeps from (x, y); first and last are always kept."""
+    size = len(x)
+    if n >= size:
+        return np.arange(size)
+    if n < 3:                       # no room for a bucket: just the end points (the first alone for n=1)
+        return np.array([0, size - 1][:max(n, 0)], dtype=np.int64)
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)   # n - 2 buckets between the end points
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i == n - 3:
+            cx, cy = x[-1], y[-1]
+        else:
+            nhi = edges[i + 2]
+            cx, cy = x[hi:nhi].mean(), y[hi:nhi].mean()
+        # Keep the point forming the largest triangle with the last kept point and the next bucket's mean
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def downsample(s, n):
+    """`s` (sorted datetime/number index) reduced to at most `n` points; shorter series pass through."""
+    if n <= 0 or len(s) <= n:
+        return s
+    s = s[s.notna() & s.index.notna()]
+    if len(s) <= n:
+        return s
+    idx = s.index
+    x = idx.asi8 if isinstance(idx, pd.DatetimeIndex) else idx.to_numpy()
+    return s.iloc[lttb(x, s.to_numpy(), n)]
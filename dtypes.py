@@ -0,0 +1,71 @@
+# dtypes.py — compact in-memory representation for cached frames (no Streamlit imports)
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+def to_num(df, cols):
+    """In place: non-numeric `cols` -> numbers (unparseable -> NaN). Returns df."""
+    for c in cols:
+        if c and c in df.columns and not pd.api.types.is_numeric_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+
+def compact(df, categories=(), counts=(), dates=()):
+    """In place: text `categories` -> category dtype, integral `counts` -> smallest int type,
+    `dates` held as Python date objects -> datetime64 (unparseable -> NaT).
+
+    Count columns holding NULLs or fractions stay float64 so sums are unchanged.
+    Runs on every fetched chunk, so already-compact columns are left alone.
+    """
+    for c in categories:
+        if c in df.columns and df[c].dtype == object:
+            df[c] = df[c].astype("category")
+    for c in counts:
+        if c not in df.columns:
+            continue
+        s = df[c]
+        if pd.api.types.is_integer_dtype(s.dtype) and s.dtype.itemsize > 1:
+            df[c] = pd.to_numeric(s, downcast="integer")
+        elif pd.api.types.is_float_dtype(s.dtype) and len(s):
+            v = s.to_numpy()
+            if np.isfinite(v).all() and (v == np.round(v)).all():
+                df[c] = pd.to_numeric(v.astype(np.int64), downcast="integer")
+    for c in dates:
+        if c in df.columns and df[c].dtype == object:
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+    return df
+
+
+def compact_match(df, schema):
+    """In place: compact() a dw.mv_team_match frame/chunk, columns resolved through its Schema.
+
+    Names / venue / result as categoricals, goal and point counts as small ints,
+    the match date as datetime64. The one spec for the app's and batch.py's loads.
+    """
+    return compact(df, schema.projection(("competition_name", "season_name", "team_name", "home", "result")),
+                   schema.projection(("gf", "ga", "points")), schema.projection(("date",)))
+
+
+def concat(frames):
+    """pd.concat for compact chunks: categoricals stay categorical (categories unioned).
+
+    Plain pd.concat turns categoricals with differing categories back into object.
+    """
+    frames = list(frames)
+    if len(frames) == 1:
+        return frames[0]
+    cols = list(frames[0].columns)
+    cats = [c for c in cols if all(isinstance(f[c].dtype, pd.CategoricalDtype) for f in frames)]
+    if not cats:
+        return pd.concat(frames, ignore_index=True)
+    out = pd.concat([f.drop(columns=cats) for f in frames], ignore_index=True)
+    for c in cats:
+        out.insert(cols.index(c), c, union_categoricals([f[c] for f in frames], sort_categories=True))
+    return out
+
+
+def footprint(df):
+    """Bytes held by `df`, including the category / object payloads."""
+    return 0 if df is None else int(df.memory_usage(deep=True, index=True).sum())
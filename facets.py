@@ -0,0 +1,114 @@
+# facets.py — precomputed facet index for the cascading Competition/Season/Team slicers
+import numpy as np
+import pandas as pd
+
+ALL = "(All)"
+
+
+class FacetIndex:
+    """Categorical codes + per-value row postings for the slicer dimensions.
+
+    Built once per summary frame. Valid options for one dimension given the
+    other selections come from intersecting sorted row-id postings, so no
+    frame copies or string comparisons happen on a rerun.
+    """
+
+    def __init__(self, df, dims, keys=None):
+        # dims: {"comp": column, "season": column, "team": column}; missing columns are skipped
+        # keys: optional {"comp": id column, ...} used to resolve labels to typed ids
+        self.dims = {k: c for k, c in dims.items() if c and c in df.columns}
+        self.keys = {k: df[c].to_numpy() for k, c in (keys or {}).items()
+                     if k in self.dims and c and c in df.columns}
+        self.n_rows = len(df)
+        self.labels, self.lookup, self.codes, self.postings, self.values = {}, {}, {}, {}, {}
+        for k, col in self.dims.items():
+            s = df[col]
+            # Labels are the stringified values, same as the old astype(str) comparisons
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                # Compact frames: stringify the categories only and remap the existing codes
+                s = s.cat.remove_unused_categories()
+                uniq, inv = np.unique(np.asarray(s.cat.categories.astype(str), dtype=object), return_inverse=True)
+                codes = np.append(inv, -1).astype(np.int32)[s.cat.codes.to_numpy()]
+                labels = list(uniq)
+            else:
+                cat = pd.Categorical(s.astype(str).where(s.notna()))
+                codes = np.asarray(cat.codes, dtype=np.int32)
+                labels = list(cat.categories)
+
+            order = np.argsort(codes, kind="stable")
+            order = order[int((codes < 0).sum()):]          # NULLs sort first (-1), drop them
+            counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+            self.labels[k] = labels
+            self.lookup[k] = {v: i for i, v in enumerate(labels)}
+            self.codes[k] = codes
+            # No labels (empty frame / all-NULL column): np.split would still return one empty posting
+            self.postings[k] = np.split(order.astype(np.int32), np.cumsum(counts)[:-1]) if labels else []
+            # Typed value behind each label (first row holding it), for SQL parameters
+            self.values[k] = s.to_numpy()[[int(p[0]) for p in self.postings[k]]].tolist() if labels else []
+        self._memo = {}
+
+    def rows(self, sel, exclude=None):
+        """Sorted row positions matching `sel` (None = every row)."""
+        picked = []
+        for k, v in sel.items():
+            if k == exclude or k not in self.dims or not v or v == ALL:
+                continue
+            code = self.lookup[k].get(v)
+            if code is None:
+                return np.empty(0, dtype=np.int32)
+            picked.append(self.postings[k][code])
+        if not picked:
+            return None
+        picked.sort(key=len)
+        out = picked[0]
+        for p in picked[1:]:
+            out = np.intersect1d(out, p, assume_unique=True)
+        return out
+
+    def count(self, sel):
+        rows = self.rows(sel)
+        return self.n_rows if rows is None else len(rows)
+
+    def value(self, dim, label):
+        code = self.lookup.get(dim, {}).get(label)
+        return None if code is None else self.values[dim][code]
+
+    def ids(self, dim, label):
+        """Distinct typed ids behind a label (None when `dim` has no key column)."""
+        code = self.lookup.get(dim, {}).get(label)
+        if code is None or dim not in self.keys:
+            return None
+        memo_key = ("ids", dim, code)
+        hit = self._memo.get(memo_key)
+        if hit is None:
+            vals = pd.unique(self.keys[dim][self.postings[dim][code]])
+            hit = tuple(v for v in vals.tolist() if not pd.isna(v))
+            self._memo[memo_key] = hit
+        return hit
+
+    def predicates(self, sel, exclude=None):
+        """((column, typed value), ...) for the non-"(All)" selections, hashable for caching."""
+        preds = []
+        for k, v in sel.items():
+            if k == exclude or k not in self.dims or not v or v == ALL:
+                continue
+            code = self.lookup[k].get(v)
+            if code is not None:
+                preds.append((self.dims[k], self.values[k][code]))
+        return tuple(preds)
+
+    def options(self, dim, sel):
+        """["(All)"] + sorted values of `dim` valid for the other selections."""
+        if dim not in self.dims:
+            return [ALL]
+        key = (dim,) + tuple(sorted((k, v) for k, v in sel.items() if k != dim and k in self.dims))
+        hit = self._memo.get(key)
+        if hit is None:
+            rows = self.rows(sel, exclude=dim)
+            if rows is None:
+                hit = [ALL] + self.labels[dim]
+            else:
+                present = np.unique(self.codes[dim][rows])
+                hit = [ALL] + [self.labels[dim][i] for i in present[present >= 0]]
+            self._memo[key] = hit
+        return list(hit)
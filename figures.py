@@ -0,0 +1,195 @@
+# figures.py — the dashboard's figures without Streamlit: totals, home/away, points per season
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from cube import RollupCube
+from facets import ALL, FacetIndex
+from schema import resolve
+from stats import SIDE_FIELDS, home_away_table, lookup_home_away
+
+DIMS = ("comp", "season", "team")
+HOME_AWAY_FIELDS = ("gf", "ga", "points", "result", "home")
+
+
+def nz(x, d=0):
+    try:
+        if pd.isna(x): return d
+        v = float(x)
+        return int(v) if abs(v - int(v)) < 1e-9 else round(v, 2)
+    except Exception:
+        return d
+
+
+def totals(sums, cols):
+    """{field: nz(sum)} for a {field: summary column} map (unmapped fields -> 0)."""
+    return {k: nz(sums.get(c)) if c else 0 for k, c in cols.items()}
+
+
+def side_totals(sums, cols):
+    """Home/away card stats from the summary's home_*/away_* sums."""
+    stats = totals(sums, {k: cols.get(k) for k in SIDE_FIELDS})
+    stats["gd"] = nz(stats["gf"] - stats["ga"])
+    return stats
+
+
+def season_frame(hist, season_col, pts_col):
+    """Season-indexed "Points" frame for the Historical Trends chart (None when empty)."""
+    if hist is None or hist.empty:
+        return None
+    return (
+        hist.sort_values(season_col)
+        .rename(columns={season_col: "Season", pts_col: "Points"})
+    ).set_index("Season")
+
+
+def match_predicates(facets, match_dims, sel):
+    """Typed (column, id or ids) filters on dw.mv_team_match for a slicer state.
+
+    Labels resolve to ids through the summary's FacetIndex, so the match query hits
+    one indexed id column per slicer; views without ids fall back to the name column.
+    """
+    preds = []
+    for dim, (id_col, name_col) in match_dims.items():
+        label = sel.get(dim)
+        if not label or label == ALL:
+            continue
+        ids = facets.ids(dim, label)
+        if id_col and ids:
+            preds.append((id_col, ids[0] if len(ids) == 1 else ids))
+        elif name_col:
+            preds.append((name_col, facets.value(dim, label)))
+    return tuple(preds)
+
+
+class Figures:
+    """Every figure the dashboard shows, for any slicer state, from the two view frames."""
+
+    def __init__(self, summary, tm=None):
+        s = self.schema = resolve(tuple(summary.columns), "summary")
+        self.overall_cols = {k: s[k] for k in SIDE_FIELDS}
+        self.home_cols, self.away_cols = s.group("home_", SIDE_FIELDS), s.group("away_", SIDE_FIELDS)
+        self.season_col, self.pts_col = s["season"], s["points"]
+        measures = [*self.overall_cols.values(), *self.home_cols.values(), *self.away_cols.values()]
+        self.measures = tuple(dict.fromkeys(c for c in measures if c))
+        self.facets = FacetIndex(summary, {d: s[d] for d in DIMS}, {d: s[d + "_id"] for d in DIMS})
+        self.cube = RollupCube(summary, self.facets, self.measures)
+
+        self.table, self.match_dims = None, {}
+        if tm is not None and not tm.empty:
+            m = resolve(tuple(tm.columns), "match")
+            self.match_dims = {"comp": (m["competition_id"], m["competition_name"]),
+                               "season": (m["season_id"], m["season_name"]),
+                               "team": (m["team_id"], m["team_name"])}
+            cols = {k: m[k] for k in HOME_AWAY_FIELDS}
+            if cols["home"] and cols["gf"] and cols["ga"]:
+                by = tuple(dict.fromkeys(c for pair in self.match_dims.values() for c in pair if c))
+                self.table = home_away_table(tm, cols, by)
+
+    def combos(self):
+        """(competition, season, team) label triples present in the summary."""
+        f = self.facets
+        if any(d not in f.codes for d in DIMS):
+            return []
+        codes = np.column_stack([f.codes[d] for d in DIMS])
+        codes = np.unique(codes[(codes >= 0).all(axis=1)], axis=0)      # label order: categories are sorted
+        return [tuple(f.labels[d][c] for d, c in zip(DIMS, row)) for row in codes.tolist()]
+
+    def totals(self, sel):
+        return totals(self.cube.totals(sel), self.overall_cols)
+
+    def home_away(self, sel):
+        """(home, away) stats; from match rows when available, else the summary's home_/away_ sums."""
+        home, away = lookup_home_away(self.table, match_predicates(self.facets, self.match_dims, sel))
+        sums = None
+        if not (home and home["matches"] > 0) and any(self.home_cols.values()):
+            sums = self.cube.totals(sel)
+            home = side_totals(sums, self.home_cols)
+        if not (away and away["matches"] > 0) and any(self.away_cols.values()):
+            away = side_totals(sums if sums is not None else self.cube.totals(sel), self.away_cols)
+        return home, away
+
+    def points_by_season(self, comp, team):
+        if not (self.season_col and self.pts_col):
+            return None
+        rows = self.cube.series("season", {"comp": comp, "team": team}, (self.pts_col,))
+        hist = pd.DataFrame([{self.season_col: s, self.pts_col: v[self.pts_col]} for s, v in rows],
+                            columns=[self.season_col, self.pts_col])
+        return season_frame(hist, self.season_col, self.pts_col)
+
+    def record(self, comp, season, team):
+        """JSON-ready figures for one selection."""
+        sel = {"comp": comp, "season": season, "team": team}
+        home, away = self.home_away(sel)
+        pbs = self.points_by_season(comp, team)
+        return {
+            "competition": comp, "season": season, "team": team,
+            "overall": self.totals(sel), "home": home, "away": away,
+            "points_by_season": [] if pbs is None else
+                [{"season": str(k), "points": nz(v)} for k, v in pbs["Points"].items()],
+        }
+
+
+# ─────────────────────────────────────────────────────────────
+# Precomputed artifacts (written by batch.py)
+# ─────────────────────────────────────────────────────────────
+MANIFEST = "manifest.json"
+
+
+def token_json(token):
+    """A version token as stored in the manifest (timestamps from max(updated_at) become strings)."""
+    return None if token is None else json.loads(json.dumps(list(token), default=str))
+
+
+def stable_token(token):
+    """The parts of a manifest token that are final once the refresh commits.
+
+    Tokens are (filenode, writes, [marker], [logged]). The write counters are flushed
+    lazily, so a batch run right after the ETL can record them before they move; when
+    a change column or refresh log is part of the token, the counters are left out.
+    """
+    if token is None or len(token) <= 2:
+        return token
+    return [token[0], *token[2:]]
+
+
+class Artifacts:
+    """Figures precomputed for concrete (competition, season, team) selections.
+
+    Valid only while the views are at the versions recorded in the manifest;
+    "(All)" selections are never precomputed and return None.
+    """
+
+    def __init__(self, manifest, records):
+        self.manifest = manifest
+        self.by_sel = {(r["competition"], r["season"], r["team"]): r for r in records}
+        self.seasons = {}
+        for r in records:
+            self.seasons.setdefault((r["competition"], r["team"]), r["points_by_season"])
+
+    @classmethod
+    def load(cls, root):
+        try:
+            with open(os.path.join(root, MANIFEST)) as f:
+                manifest = json.load(f)
+            with open(os.path.join(root, manifest["records"])) as f:
+                return cls(manifest, json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def current(self, versions):
+        """True when every {view: version token} matches what the batch ran against."""
+        recorded = self.manifest.get("versions", {})
+        return all(v is not None and stable_token(recorded.get(view)) == stable_token(token_json(v))
+                   for view, v in versions.items())
+
+    def get(self, sel):
+        return self.by_sel.get((sel.get("comp"), sel.get("season"), sel.get("team")))
+
+    def points_by_season(self, comp, team):
+        rows = self.seasons.get((comp, team))
+        if not rows:
+            return None
+        return pd.DataFrame(rows).rename(columns={"season": "Season", "points": "Points"}).set_index("Season")
@@ -0,0 +1,146 @@
+# metrics.py — in-process timings / counters with Prometheus text export (no Streamlit imports)
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HELP = {
+    "goalytics_stage_seconds":        "Wall time per dashboard stage",
+    "goalytics_query_seconds":        "Database query time (fetch + prepare)",
+    "goalytics_query_rows_total":     "Rows fetched from the database",
+    "goalytics_query_bytes_total":    "In-memory bytes of fetched frames",
+    "goalytics_cache_requests_total": "Cache lookups",
+    "goalytics_cache_misses_total":   "Cache lookups that had to load or build",
+    "goalytics_cached_bytes":         "Bytes held by the frame stores",
+}
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt(labels):
+    if not labels:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    """Process-wide counters, gauges and (count, sum) summaries, keyed by name + labels.
+
+    `timed()` also appends to the calling thread's trace when one was started
+    with `begin_trace()`, which is how a single rerun's stages are listed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters, self.gauges, self.summaries = {}, {}, {}
+        self._local = threading.local()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            s = self.summaries.setdefault(key, [0, 0.0])
+            s[0] += 1
+            s[1] += value
+
+    # ── per-run trace ────────────────────────────────────────
+    def begin_trace(self):
+        self._local.trace = []
+        return self._local.trace
+
+    def note(self, stage, seconds, **fields):
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace.append(dict(stage=stage, ms=round(seconds * 1000, 2), **fields))
+
+    @contextmanager
+    def timed(self, stage, **labels):
+        """Context manager / decorator observing goalytics_stage_seconds{stage=...}."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            self.observe("goalytics_stage_seconds", dt, stage=stage, **labels)
+            self.note(stage, dt)
+
+    def query(self, name, seconds, rows, nbytes):
+        self.observe("goalytics_query_seconds", seconds, query=name)
+        self.inc("goalytics_query_rows_total", rows, query=name)
+        self.inc("goalytics_query_bytes_total", nbytes, query=name)
+        self.note(f"query {name}", seconds, rows=rows, bytes=nbytes)
+
+    def lookup(self, cache, miss):
+        self.inc("goalytics_cache_requests_total", cache=cache)
+        if miss:
+            self.inc("goalytics_cache_misses_total", cache=cache)
+
+    # ── reporting ────────────────────────────────────────────
+    def hit_ratios(self):
+        """{cache: (requests, hit ratio)}."""
+        with self._lock:
+            reqs = {dict(l)["cache"]: v for (n, l), v in self.counters.items() if n == "goalytics_cache_requests_total"}
+            miss = {dict(l)["cache"]: v for (n, l), v in self.counters.items() if n == "goalytics_cache_misses_total"}
+        return {c: (n, 1 - miss.get(c, 0) / n if n else 0.0) for c, n in sorted(reqs.items())}
+
+    def prometheus(self, const=()):
+        """Text exposition; `const` ((label, value), ...) is prepended to every series."""
+        with self._lock:
+            rows = [(n, l, "counter", v) for (n, l), v in self.counters.items()]
+            rows += [(n, l, "gauge", v) for (n, l), v in self.gauges.items()]
+            rows += [(n, l, "summary", tuple(s)) for (n, l), s in self.summaries.items()]
+        out, seen = [], set()
+        for name, labels, kind, v in sorted(rows, key=lambda r: (r[0], r[1])):
+            if name not in seen:
+                seen.add(name)
+                out.append(f"# HELP {name} {HELP.get(name, name)}")
+                out.append(f"# TYPE {name} {kind}")
+            if kind == "summary":
+                count, total = v
+                out.append(f"{name}_count{_fmt(const + labels)} {count}")
+                out.append(f"{name}_sum{_fmt(const + labels)} {total:.6f}")
+            else:
+                out.append(f"{name}{_fmt(const + labels)} {v}")
+        return "\n".join(out) + "\n"
+
+    def write(self, path, const=()):
+        """Atomic write for the node_exporter textfile collector."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus(const))
+        os.replace(tmp, path)
+
+    def serve(self, port, host="0.0.0.0"):
+        """/metrics on a daemon thread; returns the server."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+
+METRICS = Metrics()
@@ -0,0 +1,73 @@
+# queries.py — parameterized SQL for pushing slicer filters and aggregates down to Postgres
+from sqlalchemy import text
+
+SUMMARY_VIEW = "dw.mv_male_team_summary"
+MATCH_VIEW   = "dw.mv_team_match"
+
+
+def qi(name):
+    """Quote a column name coming from the view's own column list."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def where_clause(preds):
+    # preds: ((column, typed value), ...) -> "WHERE col = :p0 AND ...", {"p0": value}
+    # A tuple value becomes "col = ANY(:p0)", which Postgres still serves from a btree index.
+    parts, params = [], {}
+    for i, (col, val) in enumerate(preds):
+        if isinstance(val, tuple):
+            parts.append(f"{qi(col)} = ANY(:p{i})")
+            params[f"p{i}"] = list(val)
+        else:
+            parts.append(f"{qi(col)} = :p{i}")
+            params[f"p{i}"] = val
+    return ("WHERE " + " AND ".join(parts)) if parts else "", params
+
+def columns_sql(view):
+    return text(f"SELECT * FROM {view} LIMIT 0")
+
+def dimensions_sql(view, cols):
+    sel = ", ".join(qi(c) for c in cols)
+    return text(f"SELECT DISTINCT {sel} FROM {view}")
+
+def sums_sql(view, measures, preds):
+    clause, params = where_clause(preds)
+    body = ", ".join(f"SUM({qi(c)}) AS {qi(c)}" for c in measures)
+    return text(f"SELECT {body} FROM {view} {clause}"), params
+
+def grouped_sums_sql(view, by, measures, preds):
+    clause, params = where_clause(preds)
+    body = ", ".join(f"SUM({qi(c)}) AS {qi(c)}" for c in measures)
+    return text(f"SELECT {qi(by)}, {body} FROM {view} {clause} GROUP BY {qi(by)} ORDER BY {qi(by)}"), params
+
+def select_sql(view, cols, preds, order=(), since=None):
+    # since: (watermark column, last value, inclusive) -> only rows past the watermark
+    clause, params = where_clause(preds)
+    if since:
+        col, val, inclusive = since
+        cond = f"{qi(col)} {'>=' if inclusive else '>'} :wm"
+        clause = f"{clause} AND {cond}" if clause else f"WHERE {cond}"
+        params["wm"] = val
+    body = ", ".join(qi(c) for c in cols) or "*"
+    order_by = ("ORDER BY " + ", ".join(f"{qi(c)} NULLS LAST" for c in order)) if order else ""
+    return text(f"SELECT {body} FROM {view} {clause} {order_by}"), params
+
+def count_sql(view, preds):
+    clause, params = where_clause(preds)
+    return text(f"SELECT count(*) FROM {view} {clause}"), params
+
+def version_sql(view, marker=None, log=None):
+    # REFRESH MATERIALIZED VIEW swaps the relfilenode; CONCURRENTLY (and plain tables) bump the
+    # write counters. The counters are flushed lazily, reset by pg_stat_reset and frozen on a hot
+    # standby, so they are only a hint: `marker` (the view's updated_at-style column) and `log`
+    # (a refresh log the ETL appends to: view_name, refreshed_at) add tokens that always move.
+    extra = ""
+    if marker:
+        extra += f", (SELECT max({qi(marker)}) FROM {view}) AS marker"
+    if log:
+        extra += f", (SELECT max(refreshed_at) FROM {log} WHERE view_name = :view) AS logged"
+    return text(f"""
+        SELECT pg_relation_filenode(c.oid) AS filenode,
+               COALESCE(s.n_tup_ins + s.n_tup_upd + s.n_tup_del, 0) AS writes{extra}
+        FROM pg_class c LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid
+        WHERE c.oid = to_regclass(:view)
+    """), {"view": view}
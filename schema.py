@@ -0,0 +1,104 @@
+# schema.py — logical → physical column mapping for the dashboard views (no Streamlit imports)
+import re
+from functools import lru_cache
+
+# dw.mv_male_team_summary: logical name -> candidate names / regexes, in priority order
+SUMMARY_PICKS = {
+    "comp":      ["competition_name","competition","league",r".*competition.*id.*"],
+    "season":    ["season_name","season",r".*season.*id.*"],
+    "team":      ["team_name","team","club",r".*team.*id.*"],
+    "comp_id":   ["competition_id", r".*competition.*id.*"],
+    "season_id": ["season_id", r".*season.*id.*"],
+    "team_id":   ["team_id", r".*team.*id.*"],
+    "matches":   ["matches","games","played","mp",r".*matches.*"],
+    "wins":      ["wins","w",r".*wins.*"],
+    "draws":     ["draws","d",r".*draws.*"],
+    "losses":    ["losses","l",r".*loss.*"],
+    "points":    ["points","pts",r".*points.*"],
+    "gf":        ["goals_for","gf","goals_scored","goals",r".*goals.*for.*"],
+    "ga":        ["goals_against","ga","conceded",r".*goals.*against.*"],
+    "home_matches": ["home_matches","matches_home",r".*home.*matches.*"],
+    "home_wins":    ["home_wins","wins_home",r".*home.*wins.*"],
+    "home_draws":   ["home_draws","draws_home",r".*home.*draw.*"],
+    "home_losses":  ["home_losses","losses_home",r".*home.*loss.*"],
+    "home_points":  ["home_points","points_home",r".*home.*points.*"],
+    "home_gf":      ["home_goals_for","goals_for_home",r".*home.*goals.*for.*"],
+    "home_ga":      ["home_goals_against","goals_against_home",r".*home.*goals.*against.*"],
+    "away_matches": ["away_matches","matches_away",r".*away.*matches.*"],
+    "away_wins":    ["away_wins","wins_away",r".*away.*wins.*"],
+    "away_draws":   ["away_draws","draws_away",r".*away.*draw.*"],
+    "away_losses":  ["away_losses","losses_away",r".*away.*loss.*"],
+    "away_points":  ["away_points","points_away",r".*away.*points.*"],
+    "away_gf":      ["away_goals_for","goals_for_away",r".*away.*goals.*for.*"],
+    "away_ga":      ["away_goals_against","goals_against_away",r".*away.*goals.*against.*"],
+    # Optional "last changed" column for incremental refreshes; must move on updates, not just inserts
+    "watermark": ["refreshed_at","updated_at",r".*(refreshed|updated)_at.*"],
+}
+
+# Summary keys that are additive measures (everything but the slicer labels, ids and watermark)
+SUMMARY_MEASURES = tuple(k for k in SUMMARY_PICKS
+                         if k not in ("comp", "season", "team", "comp_id", "season_id", "team_id", "watermark"))
+
+# dw.mv_team_match
+MATCH_PICKS = {
+    "date":   ["match_date", r".*date.*"],
+    "gf":     ["goals_for","gf", r".*goals.*for.*"],
+    "ga":     ["goals_against","ga", r".*goals.*against.*"],
+    "points": ["points","pts", r".*point.*"],
+    "result": ["result", r".*\b(W|D|L)\b.*"],
+    "home":   ["is_home", "home_away", "venue", r".*home.*away.*"],
+    "match_id":         ["match_id"],
+    "competition_id":   ["competition_id"],
+    "competition_name": ["competition_name"],
+    "season_id":        ["season_id"],
+    "season_name":      ["season_name"],
+    "team_id":          ["team_id"],
+    "team_name":        ["team_name"],
+    # Optional "last changed" column, as for the summary
+    "watermark":        ["updated_at","refreshed_at", r".*(refreshed|updated)_at.*"],
+}
+
+# Logical columns the match-level charts / home-away engine read
+MATCH_FIELDS = ("date", "gf", "ga", "points", "result", "home")
+
+PICKS = {"summary": SUMMARY_PICKS, "match": MATCH_PICKS}
+
+
+def pick(columns, names_or_regex):
+    """First exact (case-insensitive) name, else the first regex hit, else None."""
+    lc_map = {c.lower(): c for c in columns}
+    for n in names_or_regex:
+        if isinstance(n, str) and n.lower() in lc_map:
+            return lc_map[n.lower()]
+    for pat in names_or_regex:
+        rx = re.compile(pat, re.IGNORECASE)
+        for c in columns:
+            if rx.fullmatch(c) or rx.search(c):
+                return c
+    return None
+
+
+class Schema:
+    """Resolved mapping for one view; `columns` (its column list) is the fingerprint."""
+
+    def __init__(self, columns, picks):
+        self.columns = tuple(columns)
+        self.cols = {k: pick(self.columns, names) for k, names in picks.items()}
+
+    def __getitem__(self, key):
+        return self.cols.get(key)
+
+    def group(self, prefix, fields):
+        """{field: column} for `prefix + field` keys, e.g. group("home_", ...)."""
+        return {f: self.cols.get(prefix + f) for f in fields}
+
+    def projection(self, keys=None):
+        """Distinct mapped physical columns (in `keys` order), for SELECT lists."""
+        keys = self.cols if keys is None else keys
+        return tuple(dict.fromkeys(c for c in (self.cols.get(k) for k in keys) if c))
+
+
+@lru_cache(maxsize=32)
+def resolve(columns, kind):
+    """Schema for a view's column tuple; `kind` is "summary" or "match". Cached per fingerprint."""
+    return Schema(columns, PICKS[kind])
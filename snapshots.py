@@ -0,0 +1,75 @@
+# snapshots.py — shared on-disk Arrow snapshots of query results across worker processes
+import hashlib
+import os
+import threading
+
+try:
+    import pyarrow as pa
+except ImportError:            # snapshots are optional; FrameStore works without them
+    pa = None
+
+
+def _digest(obj):
+    return hashlib.sha1(repr(obj).encode("utf-8")).hexdigest()[:20]
+
+
+class SnapshotCache:
+    """Arrow IPC files keyed by (view, query, params) and the view's version token.
+
+    Files are written uncompressed so other processes can memory-map them; numeric
+    columns without nulls then come back without copying, and the page cache holds
+    one shared copy for every replica on the host. A snapshot is only ever read for
+    the exact version it was written for, so no extra staleness is introduced.
+
+    Replicas probe their version tokens up to `grace` seconds apart, so for a while
+    after a refresh the old and new version are both in use; a save only removes
+    versions of the query last written more than `grace` seconds before it.
+    """
+
+    def __init__(self, root, grace=120):
+        self.root, self.grace = root, grace
+        self.enabled = pa is not None and bool(root)
+
+    def path(self, view, key, version):
+        return os.path.join(self.root, view, _digest(key), _digest(version) + ".arrow")
+
+    def load(self, view, key, version):
+        if not self.enabled:
+            return None
+        path = self.path(view, key, version)
+        try:
+            # Not closed explicitly: the returned columns may still point into the mapping
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+            return table.to_pandas(split_blocks=True)
+        except (FileNotFoundError, pa.ArrowInvalid, OSError):
+            return None
+
+    def save(self, view, key, version, frame):
+        if not self.enabled:
+            return
+        path = self.path(view, key, version)
+        folder = os.path.dirname(path)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(folder, exist_ok=True)
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)          # atomic: readers never see a half-written file
+        except (pa.ArrowException, OSError, ValueError, TypeError):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        # Versions superseded well before this one go; mapped readers keep their pages
+        try:
+            cutoff = os.path.getmtime(path) - self.grace
+        except OSError:
+            return
+        for name in os.listdir(folder):
+            other = os.path.join(folder, name)
+            if name.endswith(".arrow") and other != path:
+                try:
+                    if os.path.getmtime(other) < cutoff:
+                        os.remove(other)
+                except OSError:
+                    pass
@@ -0,0 +1,89 @@
+# standings.py — season league tables and rolling form over dw.mv_team_match rows (no Streamlit imports)
+import numpy as np
+import pandas as pd
+
+from stats import outcomes
+
+RESULT_LETTERS = np.array(["W", "D", "L", "?"])
+
+
+def _window_sums(x, starts, n):
+    """Sum of `x` over each row's last `n` rows, never reaching back past its group's start."""
+    cs = np.concatenate(([0.0], np.cumsum(x, dtype=float)))
+    i = np.arange(1, len(x) + 1)
+    return cs[i] - cs[np.maximum(i - n, starts)]
+
+
+def _streaks(hit, starts):
+    """Length of the run of `hit` rows ending at each row (0 on a miss), restarting per group."""
+    i = np.arange(len(hit))
+    # Position of the latest miss, with a virtual miss just before each group's first row
+    last_miss = np.maximum.accumulate(np.maximum(np.where(hit, -1, i), starts - 1))
+    return np.where(hit, i - last_miss, 0)
+
+
+def form_frame(tm, cols, team, order, n=5):
+    """Per-match form for every team at once, sorted by team then `order`.
+
+    Columns: team, the `order` columns, result (W/D/L), W/D/L (0/1), GF, GA,
+    Pts, GD, then over each team's last `n` matches "Last n pts" and
+    "GD (last n)", and the current "Win streak" / "Unbeaten" run after each
+    match. `cols` maps gf/ga (+ points/result) like home_away_table().
+    """
+    gf, ga, w, d, l, pts = outcomes(tm, cols)
+    codes, _ = pd.factorize(tm[team], sort=True)
+    f = pd.DataFrame({"team": tm[team].array, **{c: tm[c].array for c in order},
+                      "result": RESULT_LETTERS[np.select([w, d, l], [0, 1, 2], 3)],
+                      "W": w.astype(np.int16), "D": d.astype(np.int16), "L": l.astype(np.int16),
+                      "GF": gf, "GA": ga, "Pts": pts, "GD": gf - ga, "_code": codes})
+    f = f[codes >= 0].sort_values(["_code", *order], kind="stable", ignore_index=True)
+
+    # Rows are contiguous per team now: every window / run is a numpy pass over the group bounds
+    code = f.pop("_code").to_numpy()
+    first = np.r_[True, code[1:] != code[:-1]] if len(code) else np.zeros(0, dtype=bool)
+    starts = np.maximum.accumulate(np.where(first, np.arange(len(code)), 0))
+    f[f"Last {n} pts"] = _window_sums(f["Pts"].to_numpy(), starts, n)
+    f[f"GD (last {n})"] = _window_sums(f["GD"].to_numpy(), starts, n)
+    win = f["W"].to_numpy() > 0
+    f["Win streak"] = _streaks(win, starts)
+    f["Unbeaten"] = _streaks(win | (f["D"].to_numpy() > 0), starts)
+    return f
+
+
+def league_table(form, n=5):
+    """Standings from form_frame(): one row per team, ranked by Pts, then GD, then GF.
+
+    Form is the last `n` results (oldest first); the streak columns are the
+    current and the season's longest runs.
+    """
+    if form.empty:
+        return pd.DataFrame()
+    code = pd.factorize(form["team"])[0]
+    first = np.flatnonzero(np.r_[True, code[1:] != code[:-1]])
+    last = np.r_[first[1:], len(form)] - 1
+    sums = lambda c: np.add.reduceat(form[c].to_numpy(dtype=float), first)
+    results = form["result"].to_numpy()
+
+    t = pd.DataFrame({
+        "Team": form["team"].to_numpy()[first].astype(str),
+        "P": last - first + 1,
+        **{c: sums(c) for c in ("W", "D", "L", "GF", "GA", "Pts")},
+    })
+    t.insert(t.columns.get_loc("Pts"), "GD", t["GF"] - t["GA"])
+    t = t.astype({c: int for c in ("W", "D", "L", "GF", "GA", "Pts", "GD")})   # float from outcomes()
+    t["Form"] = ["".join(results[max(a, b - n + 1):b + 1]) for a, b in zip(first, last)]
+    t[f"Last {n} pts"] = form[f"Last {n} pts"].to_numpy()[last].astype(int)
+    t["Win streak"] = form["Win streak"].to_numpy()[last]
+    t["Unbeaten"] = form["Unbeaten"].to_numpy()[last]
+    t["Best win streak"] = np.maximum.reduceat(form["Win streak"].to_numpy(), first)
+    t["Best unbeaten"] = np.maximum.reduceat(form["Unbeaten"].to_numpy(), first)
+
+    t = t.sort_values(["Pts", "GD", "GF", "Team"], ascending=[False, False, False, True], ignore_index=True)
+    t.insert(0, "Pos", np.arange(1, len(t) + 1))
+    return t
+
+
+def standings(tm, cols, team, order, n=5):
+    """(league table, per-match form frame) for the match rows of one competition/season."""
+    form = form_frame(tm, cols, team, order, n)
+    return league_table(form, n), form
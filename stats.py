@@ -0,0 +1,92 @@
+# stats.py — vectorized home/away engine over dw.mv_team_match rows (no Streamlit imports)
+import numpy as np
+import pandas as pd
+
+HOME_WORDS  = {"home","h","host","บ้าน","true","1","t","yes","y"}
+AWAY_WORDS  = {"away","a","visitor","เยือน","false","0","f","no","n"}
+SIDE_FIELDS = ("matches","wins","draws","losses","points","gf","ga")
+
+
+def _lut(values, fn):
+    """Classify each distinct value once (categorical lookup table), then broadcast by code."""
+    cat = pd.Categorical(values)
+    table = np.array([fn(v) for v in cat.categories] + [-1], dtype=np.int8)
+    return table[cat.codes]          # NaN has code -1 -> the trailing -1
+
+def _side(v):
+    s = str(v).strip().lower()
+    return 1 if s in HOME_WORDS else 0 if s in AWAY_WORDS else -1
+
+def _result(v):
+    s = str(v).lower()
+    return 0 if s.startswith("w") else 1 if s.startswith("d") else 2 if s.startswith("l") else -1
+
+def home_flags(s):
+    """1 = home, 0 = away, -1 = unknown, for a venue / is_home column of any encoding."""
+    if s.dtype == bool:
+        return s.to_numpy().astype(np.int8)
+    return _lut(s, _side)
+
+def result_codes(s):
+    """0 = win, 1 = draw, 2 = loss, -1 = unknown (W/D/L, win/draw/loss, ...)."""
+    return _lut(s, _result)
+
+
+def outcomes(tm, cols):
+    """Per-row (gf, ga, win, draw, loss, points) arrays for match rows.
+
+    `cols` maps gf/ga (required) and points/result (optional) to physical
+    columns. Without a result column W/D/L come from the score, without points
+    from 3*W + D.
+    """
+    gf_raw = pd.to_numeric(tm[cols["gf"]], errors="coerce").to_numpy(dtype=float)
+    ga_raw = pd.to_numeric(tm[cols["ga"]], errors="coerce").to_numpy(dtype=float)
+    if cols.get("result"):
+        res = result_codes(tm[cols["result"]])
+        w, d, l = res == 0, res == 1, res == 2
+    else:
+        w, d, l = gf_raw > ga_raw, gf_raw == ga_raw, gf_raw < ga_raw
+    if cols.get("points"):
+        pts = np.nan_to_num(pd.to_numeric(tm[cols["points"]], errors="coerce").to_numpy(dtype=float))
+    else:
+        pts = 3 * w + d
+    return np.nan_to_num(gf_raw), np.nan_to_num(ga_raw), w, d, l, pts
+
+
+def home_away_table(tm, cols, by=()):
+    """home_*/away_* sums (matches, wins, draws, losses, points, gf, ga) per `by` group.
+
+    `cols` maps gf/ga/home (required) and points/result (optional), see outcomes().
+    One groupby pass covers every group at once.
+    """
+    gf, ga, w, d, l, pts = outcomes(tm, cols)
+    side = home_flags(tm[cols["home"]])
+
+    parts = {"matches": np.ones(len(tm)), "wins": w, "draws": d, "losses": l, "points": pts, "gf": gf, "ga": ga}
+    data = {}
+    for name, on_side in (("home", side == 1), ("away", side == 0)):
+        for field, v in parts.items():
+            data[f"{name}_{field}"] = np.where(on_side, v, 0).astype(float)
+    out = pd.DataFrame(data, index=tm.index)
+    if not by:
+        return out.sum().to_frame().T
+    for c in by:
+        out[c] = tm[c]
+    return out.groupby(list(by), observed=True, dropna=False, sort=False).sum().reset_index()
+
+def side_stats(totals, side):
+    d = {f: int(totals.get(f"{side}_{f}", 0)) for f in SIDE_FIELDS}
+    d["gd"] = d["gf"] - d["ga"]
+    return d
+
+def lookup_home_away(table, preds=()):
+    """Sum the table rows matching ((column, value or tuple of values), ...) -> (home, away)."""
+    if table is None or table.empty:
+        return None, None
+    t = table
+    for col, val in preds:
+        if col in t.columns:
+            t = t[t[col].isin(val if isinstance(val, tuple) else (val,))]
+    value_cols = [c for c in t.columns if c.startswith(("home_", "away_"))]
+    totals = t[value_cols].sum()
+    return side_stats(totals, "home"), side_stats(totals, "away")
@@ -0,0 +1,442 @@
+# store.py — long-lived cached frames, refreshed incrementally from a view watermark
+import select
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from dtypes import concat, footprint
+from metrics import METRICS
+from queries import count_sql, qi, select_sql, version_sql
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done, self.result, self.error = threading.Event(), None, None
+
+
+class SingleFlight:
+    """At most one in-flight call per key; concurrent callers wait for it and share the result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as exc:
+                call.error = exc
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class ViewVersion:
+    """Change token for one view, probed at most every `interval` seconds (or when invalidated).
+
+    The catalog part (relfilenode + write counters) misses CONCURRENTLY refreshes on a
+    standby; `log` (refresh log table) and track() (max of a change column) make it reliable.
+    """
+
+    def __init__(self, engine, view, interval=120, log=None):
+        self.engine, self.view, self.interval, self.log = engine, view, interval, log
+        self.marker = None
+        self.token, self.checked = None, None
+        self._settling = False
+        self.stores = []          # FrameStores to warm after an invalidation
+        self._lock = threading.Lock()
+
+    def current(self):
+        with self._lock:
+            if self.checked is None or time.monotonic() - self.checked >= self.interval:
+                self.token = self.probe()
+                self.checked = time.monotonic()
+            return self.token
+
+    def track(self, column):
+        """Fold max(`column`) into the token (a change column, once the view's schema is known)."""
+        with self._lock:
+            if column != self.marker:
+                self.marker, self.checked = column, None
+
+    def invalidate(self, warm=False, settle=False):
+        """Re-probe on next use; `warm` reloads the stores' entries now.
+
+        With `settle` (a NOTIFY announced a refresh) re-probing continues with backoff
+        in the background until the token moves: the notification can arrive before
+        the refreshing backend's statistics are flushed, and a single re-probe would
+        then keep the old token until the next scheduled probe.
+        """
+        with self._lock:
+            self.checked = None
+            before = self.token
+            if settle:
+                if self._settling:
+                    return
+                self._settling = True
+        if settle:
+            threading.Thread(target=self._settle, args=(before, warm), name="settle", daemon=True).start()
+        elif warm:
+            self._warm()
+
+    def _settle(self, before, warm, timeout=600.0, delay=0.5, cap=30.0):
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                try:
+                    token = self.probe()
+                    with self._lock:
+                        self.token, self.checked = token, time.monotonic()
+                except Exception:
+                    token = before
+                if token != before or time.monotonic() + delay > deadline:
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, cap)
+        finally:
+            with self._lock:
+                self._settling = False
+        if warm:
+            self._warm()
+
+    def _warm(self):
+        for store in list(self.stores):
+            try:
+                store.warm()
+            except Exception:
+                pass   # the next get() loads it in the foreground
+
+    def probe(self):
+        sql, params = version_sql(self.view, self.marker, self.log)
+        with self.engine.connect() as conn:
+            row = conn.execute(sql, params).first()
+        return tuple(row) if row else None
+
+
+class _Entry:
+    __slots__ = ("frame", "version", "watermark", "prepare", "nbytes")
+
+    def __init__(self, frame, version, watermark, prepare=None, nbytes=None):
+        self.frame, self.version, self.watermark, self.prepare = frame, version, watermark, prepare
+        # Measured once per load: a deep memory_usage walks every object column
+        self.nbytes = footprint(frame) if nbytes is None else nbytes
+
+
+class FrameStore:
+    """Cached query results for one view, keyed by (columns, predicates, order).
+
+    While the view's version token is unchanged a get() is a dict lookup. When it
+    moves, an entry with a change-tracking `watermark` column (updated_at /
+    refreshed_at, bumped on every insert *and* update) and row `keys` fetches only
+    rows changed since its watermark and replaces them on `keys`; a row-count check
+    falls back to a full reload if rows disappeared. Anything else (no watermark,
+    no keys) is reloaded in full, since an append-only watermark such as an id or
+    a date cannot see rows corrected in place. With `snapshots` set, a miss first looks
+    for a snapshot another process wrote for the same version, and every load is
+    written back. Returned frames are shared: treat them as read-only.
+
+    Rows stream from a server-side cursor `chunk_rows` at a time, each chunk
+    prepared (coerced / compacted) before the next is fetched, so peak memory is
+    one chunk of Python objects plus the compact frame.
+
+    Loads are single-flight per (key, version): concurrent misses wait on one
+    query. With `serve_stale`, an entry from an older version is returned at once
+    while a single background refresh brings it up to date.
+    """
+
+    def __init__(self, engine, view, watermark=None, keys=(), version=None, interval=120,
+                 max_entries=64, snapshots=None, serve_stale=True, chunk_rows=50_000):
+        self.engine, self.view, self.chunk_rows = engine, view, chunk_rows
+        self.snapshots, self.serve_stale = snapshots, serve_stale
+        self._flight = SingleFlight()
+        self.watermark, self.keys = watermark, tuple(keys)
+        self.version = version or ViewVersion(engine, view, interval)
+        self.version.stores.append(self)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cols=(), preds=(), order=(), prepare=None):
+        return self.get_versioned(cols, preds, order, prepare)[0]
+
+    def get_versioned(self, cols=(), preds=(), order=(), prepare=None):
+        """(frame, version token it was loaded at) — for caches derived from the frame."""
+        key = self._key(cols, preds, order)
+        token = self.version.current()
+        with self._lock:
+            e = self.entries.get(key)
+            if e is not None:
+                self.entries.move_to_end(key)
+        # Stale frames served while revalidating count as hits: nothing waits on the database
+        METRICS.lookup(self.view, miss=e is None or (e.version != token and not self.serve_stale))
+        if e is not None and e.version == token:
+            return e.frame, e.version
+        if e is not None and self.serve_stale:
+            self._revalidate(key, token, prepare)
+            return e.frame, e.version
+        return self._flight.do((key, token), lambda: self._load(key, token, prepare))
+
+    def cached(self, cols=(), preds=(), order=()):
+        """True when get() would be answered from memory at the current version."""
+        key = self._key(cols, preds, order)
+        token = self.version.current()
+        with self._lock:
+            e = self.entries.get(key)
+        return e is not None and e.version == token
+
+    def prefetch(self, cols=(), preds=(), order=(), prepare=None):
+        """Load an entry ahead of use (no-op when current); not counted as a cache lookup."""
+        key = self._key(cols, preds, order)
+        token = self.version.current()
+        with self._lock:
+            e = self.entries.get(key)
+        if e is None or e.version != token:
+            self._flight.do((key, token), lambda: self._load(key, token, prepare))
+
+    def warm(self):
+        """Bring every cached entry up to the current version now, not on next access."""
+        token = self.version.current()
+        with self._lock:
+            stale = [(key, e.prepare) for key, e in self.entries.items() if e.version != token]
+        for key, prepare in stale:
+            self._flight.do((key, token), lambda: self._load(key, token, prepare))
+
+    def nbytes(self):
+        """Memory held by the cached frames (deep, so category/object payloads count)."""
+        with self._lock:
+            return sum(e.nbytes for e in self.entries.values())
+
+    def _revalidate(self, key, token, prepare):
+        if self._flight.in_flight((key, token)):
+            return
+
+        def run():
+            try:
+                self._flight.do((key, token), lambda: self._load(key, token, prepare))
+            except Exception:
+                pass   # keep serving the stale frame; the next get() retries
+        threading.Thread(target=run, name="revalidate", daemon=True).start()
+
+    def _load(self, key, token, prepare):
+        # Runs once per (key, version) under the single-flight; the DB work happens unlocked
+        with self._lock:
+            e = self.entries.get(key)
+        if e is not None and e.version == token:
+            return e.frame, e.version
+        if e is None:
+            e = self._snapshot(key, token, prepare) or self._full(key, token, prepare)
+        else:
+            e = self._snapshot(key, token, prepare) or self._refresh(key, e, token, prepare)
+        with self._lock:
+            self.entries[key] = e
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        METRICS.set("goalytics_cached_bytes", self.nbytes(), view=self.view)
+        return e.frame, e.version
+
+    # ── loading ──────────────────────────────────────────────
+    def _key(self, cols, preds, order):
+        cols, order = tuple(cols), tuple(order)
+        if cols:
+            # The merge re-sorts on `order` and matches on the watermark + row keys, so cached
+            # frames always carry those columns
+            extra = order + ((self.watermark, *self.keys) if self.watermark and self.keys else ())
+            cols += tuple(dict.fromkeys(c for c in extra if c not in cols))
+        return cols, tuple(preds), order
+
+    def _read(self, sql, params, prepare):
+        t0 = time.perf_counter()
+        chunks = []
+        with self.engine.connect() as conn:
+            # stream_results = psycopg2 named (server-side) cursor, fetched chunk_rows at a time
+            conn.execution_options(stream_results=True, max_row_buffer=self.chunk_rows)
+            for chunk in pd.read_sql_query(sql, conn, params=params, chunksize=self.chunk_rows):
+                if prepare:
+                    prepare(chunk)
+                chunks.append(chunk)
+        frame = concat(chunks)
+        nbytes = footprint(frame)
+        METRICS.query(self.view, time.perf_counter() - t0, len(frame), nbytes)
+        return frame, nbytes
+
+    def _mark(self, frame):
+        if not self.watermark or self.watermark not in frame.columns or frame.empty:
+            return None
+        wm = frame[self.watermark].max()
+        if pd.isna(wm):
+            return None
+        return wm.item() if hasattr(wm, "item") else wm
+
+    def _snapshot(self, key, token, prepare):
+        if not self.snapshots or token is None:
+            return None
+        frame = self.snapshots.load(self.view, key, token)
+        METRICS.lookup("snapshot", miss=frame is None)
+        return None if frame is None else _Entry(frame, token, self._mark(frame), prepare)
+
+    def _keep(self, key, token, frame, prepare, watermark=None, nbytes=None):
+        if self.snapshots and token is not None:
+            self.snapshots.save(self.view, key, token, frame)
+        return _Entry(frame, token, self._mark(frame) or watermark, prepare, nbytes)
+
+    def _full(self, key, token, prepare):
+        cols, preds, order = key
+        frame, nbytes = self._read(*select_sql(self.view, cols, preds, order), prepare)
+        return self._keep(key, token, frame, prepare, nbytes=nbytes)
+
+    def _refresh(self, key, e, token, prepare):
+        cols, preds, order = key
+        if e.watermark is None or not self.keys:
+            return self._full(key, token, prepare)
+
+        # Inclusive: rows rewritten at the watermark itself come back and replace their old copy
+        delta, _ = self._read(*select_sql(self.view, cols, preds, order,
+                                       since=(self.watermark, e.watermark, True)), prepare)
+        frame = e.frame
+        if not delta.empty:
+            stale = frame.set_index(list(self.keys)).index.isin(delta.set_index(list(self.keys)).index)
+            frame = concat([frame[~stale], delta])
+            if order:
+                frame = frame.sort_values(list(order), kind="stable", na_position="last", ignore_index=True)
+
+        sql, params = count_sql(self.view, preds)
+        with self.engine.connect() as conn:
+            n = conn.execute(sql, params).scalar()
+        if n != len(frame):   # rows deleted since the last load
+            return self._full(key, token, prepare)
+        return self._keep(key, token, frame, prepare, e.watermark)
+
+
+class Prefetcher:
+    """Warm-up loads on a small bounded pool, off the script thread.
+
+    At most `max_pending` keys wait or run at once; further submissions (and
+    repeats of a pending key) are dropped rather than queued, so a user clicking
+    through selections never builds up a backlog. Errors are swallowed: the
+    foreground load simply retries.
+    """
+
+    def __init__(self, workers=2, max_pending=16):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self.max_pending = max_pending
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn):
+        with self._lock:
+            if key in self._pending or len(self._pending) >= self.max_pending:
+                return False
+            self._pending.add(key)
+
+        def run():
+            try:
+                fn()
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+        self._pool.submit(run)
+        return True
+
+
+def warm_pool(engine, n=2):
+    """Check `n` connections into the engine's pool from a daemon thread.
+
+    Connect, TLS and auth (and the dialect's first-connect setup) then run
+    alongside the first queries of a cold process instead of in front of
+    each of them. Failures are ignored: the foreground connects as usual.
+    """
+    def run():
+        conns = []
+        try:
+            for _ in range(n):
+                conns.append(engine.connect())
+        except Exception:
+            pass
+        finally:
+            for conn in conns:
+                conn.close()
+    thread = threading.Thread(target=run, name="warm-pool", daemon=True)
+    thread.start()
+    return thread
+
+
+class NotifyListener(threading.Thread):
+    """LISTEN on `channel` and invalidate (and warm) the watched views on each NOTIFY.
+
+    The ETL sends the refreshed view name as payload, e.g.
+    ``NOTIFY goalytics_refresh, 'dw.mv_team_match'``; an empty or unknown payload
+    invalidates every watched view. Each notified view is re-probed with backoff until
+    its token moves (see ViewVersion.invalidate). Uses a dedicated connection detached from the
+    pool and reconnects after errors, invalidating everything since notifications
+    may have been missed meanwhile.
+    """
+
+    def __init__(self, engine, channel, poll=5.0, reconnect=5.0):
+        super().__init__(name=f"notify-{channel}", daemon=True)
+        self.engine, self.channel = engine, channel
+        self.poll, self.reconnect = poll, reconnect
+        self.versions = {}
+        self._halt = threading.Event()
+
+    def watch(self, version):
+        self.versions[version.view] = version
+
+    def stop(self):
+        self._halt.set()
+
+    def notify(self, payload, settle=True):
+        targets = [self.versions[payload]] if payload in self.versions else list(self.versions.values())
+        for v in targets:
+            v.invalidate(warm=True, settle=settle)
+
+    def run(self):
+        while not self._halt.is_set():
+            conn = None
+            try:
+                conn = self.engine.raw_connection()
+                dbapi = conn.driver_connection
+                conn.detach()                     # autocommit + LISTEN must not leak back into the pool
+                dbapi.autocommit = True
+                with dbapi.cursor() as cur:
+                    cur.execute(f"LISTEN {qi(self.channel)}")
+                self.notify(None, settle=False)   # possibly missed some; no refresh is known to be pending
+                while not self._halt.is_set():
+                    if not select.select([dbapi], [], [], self.poll)[0]:
+                        continue
+                    dbapi.poll()
+                    payloads = {n.payload for n in dbapi.notifies}
+                    dbapi.notifies.clear()
+                    for payload in payloads:
+                        self.notify(payload or None)
+            except Exception:
+                self._halt.wait(self.reconnect)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
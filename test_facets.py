@@ -0,0 +1,41 @@
+# test_facets.py — FacetIndex edge cases (run with `python -m pytest`)
+import pandas as pd
+
+from facets import ALL, FacetIndex
+
+DIMS = {"comp": "competition_name", "season": "season_name", "team": "team_name"}
+KEYS = {"comp": "competition_id", "season": "season_id", "team": "team_id"}
+
+
+def frame():
+    return pd.DataFrame({
+        "competition_id": [1, 1, 2], "competition_name": ["League 1", "League 1", "League 2"],
+        "season_id": [10, 11, 10], "season_name": ["2023/2024", "2024/2025", "2023/2024"],
+        "team_id": [7, 7, 8], "team_name": ["Team A", "Team A", "Team B"],
+    })
+
+
+def test_options_cascade():
+    f = FacetIndex(frame(), DIMS, KEYS)
+    assert f.options("comp", {}) == [ALL, "League 1", "League 2"]
+    assert f.options("season", {"comp": "League 2"}) == [ALL, "2023/2024"]
+    assert f.ids("team", "Team A") == (7,)
+    assert f.predicates({"comp": "League 1", "season": ALL, "team": ALL}) == (("competition_name", "League 1"),)
+
+
+def test_all_null_dimension():
+    df = frame()
+    df["season_name"] = None
+    for cat in (False, True):
+        f = FacetIndex(df.astype({"season_name": "category"}) if cat else df, DIMS, KEYS)
+        assert f.options("season", {}) == [ALL]
+        assert f.options("comp", {"season": ALL}) == [ALL, "League 1", "League 2"]
+        assert f.count({"season": "2023/2024"}) == 0
+
+
+def test_empty_frame():
+    for df in (frame().iloc[:0], frame().iloc[:0].astype({c: "category" for c in DIMS.values()})):
+        f = FacetIndex(df, DIMS, KEYS)
+        assert all(f.options(d, {}) == [ALL] for d in DIMS)
+        assert f.count({}) == 0
+        assert len(f.rows({"team": "Team A"})) == 0 and f.postings["team"] == []
@@ -0,0 +1,75 @@
+# test_store.py — FrameStore incremental refresh against SQLite (run with `python -m pytest`)
+import pytest
+from sqlalchemy import create_engine, text
+
+from store import FrameStore
+
+COLS = ("match_id", "team", "goals", "updated_at")
+ORDER = ("goals", "match_id")
+
+
+class Version:
+    """Stand-in for ViewVersion: the test moves the token by hand."""
+
+    def __init__(self):
+        self.token, self.stores = 1, []
+
+    def current(self):
+        return self.token
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'dw.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE matches (match_id INTEGER, team TEXT, goals INTEGER, updated_at INTEGER)"))
+        conn.execute(text("INSERT INTO matches VALUES (1, 'A', 3, 10), (2, 'B', 1, 10), (3, 'A', 2, 20)"))
+    return engine
+
+
+@pytest.fixture
+def store(db, monkeypatch):
+    s = FrameStore(db, "matches", "updated_at", ("match_id",), version=Version(), serve_stale=False)
+    s.full_loads = 0
+    full = s._full
+
+    def counted(*args):
+        s.full_loads += 1
+        return full(*args)
+    monkeypatch.setattr(s, "_full", counted)
+    return s
+
+
+def change(store, sql):
+    with store.engine.begin() as conn:
+        conn.execute(text(sql))
+    store.version.token += 1
+    return store.get(COLS, (), ORDER)
+
+
+def rows(frame):
+    return [tuple(r) for r in frame[list(COLS)].itertuples(index=False)]
+
+
+def test_update_replaces_row_at_watermark(store):
+    assert rows(store.get(COLS, (), ORDER)) == [(2, "B", 1, 10), (3, "A", 2, 20), (1, "A", 3, 10)]
+    # Rewritten at the current watermark itself: only the inclusive delta can see it
+    f = change(store, "UPDATE matches SET goals = 0, updated_at = 20 WHERE match_id = 1")
+    assert rows(f) == [(1, "A", 0, 20), (2, "B", 1, 10), (3, "A", 2, 20)]
+    assert store.full_loads == 1
+
+
+def test_insert_merges_and_resorts(store):
+    store.get(COLS, (), ORDER)
+    f = change(store, "INSERT INTO matches VALUES (4, 'B', 2, 30)")
+    assert rows(f) == [(2, "B", 1, 10), (3, "A", 2, 20), (4, "B", 2, 30), (1, "A", 3, 10)]
+    assert store.full_loads == 1
+    # Filtered entries merge only their own rows
+    assert rows(store.get(COLS, (("team", "B"),), ORDER)) == [(2, "B", 1, 10), (4, "B", 2, 30)]
+
+
+def test_delete_falls_back_to_full_reload(store):
+    store.get(COLS, (), ORDER)
+    f = change(store, "DELETE FROM matches WHERE match_id = 2")
+    assert rows(f) == [(3, "A", 2, 20), (1, "A", 3, 10)]
+    assert store.full_loads == 2